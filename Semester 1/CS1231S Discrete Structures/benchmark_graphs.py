@@ -0,0 +1,211 @@
+"""
+Benchmarks for graphs.py against networkx
+
+	python benchmark_graphs.py --sizes 100 1000 10000 --output bench.json
+	python benchmark_graphs.py --sizes 100 1000 --compare bench.json
+"""
+import argparse
+import gc
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import networkx as nx
+
+from graphs import Graph, Minimum_Spanning_Tree
+
+
+def random_sparse_graph(n: int, seed: int, average_degree: int = 4) -> Graph:
+	"""
+	Connected random graph: a random spanning tree plus random extra edges up to the average degree
+	"""
+	rng = random.Random(seed)
+	edges = [[i, rng.randrange(i), rng.randint(1, 1000)] for i in range(1, n)]
+	edges += [[rng.randrange(n), rng.randrange(n), rng.randint(1, 1000)] for _ in range(n * average_degree // 2 - (n - 1))]
+	return Graph(list(range(n)), [edge for edge in edges if edge[0] != edge[1]])
+
+
+def random_dense_graph(n: int, seed: int, p: float = 0.5) -> Graph:
+	"""
+	Erdős–Rényi G(n, p) graph with random weights
+	"""
+	rng = random.Random(seed)
+	edges = [[i, j, rng.randint(1, 1000)] for i in range(n) for j in range(i + 1, n) if rng.random() < p]
+	return Graph(list(range(n)), edges)
+
+
+def grid_graph(n: int, seed: int) -> Graph:
+	"""
+	Square grid of about n vertices with random weights, like a road network
+	"""
+	rng = random.Random(seed)
+	side = max(2, math.isqrt(n))
+	edges = []
+	for row in range(side):
+		for col in range(side):
+			cur = row * side + col
+			if col + 1 < side:
+				edges.append([cur, cur + 1, rng.randint(1, 1000)])
+			if row + 1 < side:
+				edges.append([cur, cur + side, rng.randint(1, 1000)])
+	return Graph(list(range(side * side)), edges)
+
+
+def power_law_graph(n: int, seed: int, m: int = 2) -> Graph:
+	"""
+	Barabási–Albert preferential attachment graph, every new vertex attaches to m existing ones
+	"""
+	rng = random.Random(seed)
+	edges = [[i, j, rng.randint(1, 1000)] for i in range(m + 1) for j in range(i)]
+	# Every vertex appears once per incident edge, so uniform picks are proportional to degree
+	endpoints = [vertex for edge in edges for vertex in edge[:2]]
+	for cur in range(m + 1, n):
+		targets = set()
+		while len(targets) < m:
+			targets.add(rng.choice(endpoints))
+		for target in targets:
+			edges.append([cur, target, rng.randint(1, 1000)])
+			endpoints += [cur, target]
+	return Graph(list(range(max(n, m + 1))), edges)
+
+
+GENERATORS = {
+	"sparse": random_sparse_graph,
+	"dense": random_dense_graph,
+	"grid": grid_graph,
+	"power_law": power_law_graph,
+}
+
+
+def algorithms(graph: Graph, nx_graph: nx.Graph, seed: int) -> dict:
+	"""
+	Returns the benchmarked callables of graphs.py and their networkx equivalents
+	"""
+	rng = random.Random(seed)
+	start, end = rng.choice(graph.vertices), rng.choice(graph.vertices)
+	min_span_tree = Minimum_Spanning_Tree(graph)
+
+	return {
+		("is_connected", "graphs"): lambda: graph.is_connected(start, end),
+		("is_connected", "networkx"): lambda: nx.has_path(nx_graph, start, end),
+		("kruskal_solve", "graphs"): min_span_tree.kruskal_solve,
+		("kruskal_solve", "networkx"): lambda: nx.minimum_spanning_tree(nx_graph, algorithm="kruskal"),
+		("prim_solve", "graphs"): min_span_tree.prim_solve,
+		("prim_solve", "networkx"): lambda: nx.minimum_spanning_tree(nx_graph, algorithm="prim"),
+	}
+
+
+def measure(function, repeat: int, memory: bool) -> dict:
+	"""
+	Times function repeat times, then runs it once more under tracemalloc for the peak memory
+	"""
+	seconds = []
+	for _ in range(repeat):
+		gc.collect()
+		start = time.perf_counter()
+		function()
+		seconds.append(time.perf_counter() - start)
+
+	peak = None
+	if memory:
+		gc.collect()
+		tracemalloc.start()
+		function()
+		peak = tracemalloc.get_traced_memory()[1]
+		tracemalloc.stop()
+
+	return {"seconds": seconds, "best": min(seconds), "peak_bytes": peak}
+
+
+def run(sizes: list, kinds: list, repeat: int, seed: int, max_edges: int, memory: bool, networkx: bool, quiet: bool = False) -> dict:
+	results = []
+	for kind in kinds:
+		for size in sizes:
+			if kind == "dense" and size * (size - 1) // 4 > max_edges:
+				if not quiet:
+					print("Skipping {} {}: more than {} edges".format(kind, size, max_edges), file=sys.stderr)
+				continue
+
+			graph = GENERATORS[kind](size, seed)
+			nx_graph = graph.parse_graph()
+			for (name, implementation), function in algorithms(graph, nx_graph, seed).items():
+				if implementation == "networkx" and not networkx:
+					continue
+
+				result = {
+					"generator": kind,
+					"vertices": len(graph.vertices),
+					"edges": len(graph.edges),
+					"algorithm": name,
+					"implementation": implementation,
+				}
+				result.update(measure(function, repeat, memory))
+				results.append(result)
+
+				if not quiet:
+					print("{generator:>9} V={vertices:<8} E={edges:<9} {algorithm:<14} {implementation:<9} {best:10.4f}s".format(**result), file=sys.stderr)
+
+	return {
+		"meta": {
+			"python": platform.python_version(),
+			"networkx": nx.__version__,
+			"platform": platform.platform(),
+			"seed": seed,
+			"repeat": repeat,
+			"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+		},
+		"results": results,
+	}
+
+
+def compare(report: dict, baseline: dict) -> list:
+	"""
+	Returns the ratio of best times between report and baseline for every benchmark found in both
+	"""
+	key = lambda result: (result["generator"], result["vertices"], result["algorithm"], result["implementation"])
+	baseline_results = {key(result): result for result in baseline["results"]}
+
+	ratios = []
+	for result in report["results"]:
+		if key(result) in baseline_results:
+			ratios.append(dict(zip(("generator", "vertices", "algorithm", "implementation"), key(result)), ratio=result["best"] / baseline_results[key(result)]["best"]))
+	return ratios
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark graphs.py and the networkx equivalents")
+	parser.add_argument("--sizes", type=int, nargs="+", default=[10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6])
+	parser.add_argument("--generators", nargs="+", choices=GENERATORS, default=list(GENERATORS))
+	parser.add_argument("--repeat", type=int, default=3)
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--max-edges", type=int, default=2 * 10 ** 6, help="skip dense graphs larger than this")
+	parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+	parser.add_argument("--no-networkx", action="store_true", help="skip the networkx baselines")
+	parser.add_argument("--output", help="write the JSON report here instead of stdout")
+	parser.add_argument("--compare", help="JSON report of a previous run to compare against, the time ratios are printed to stderr and stored under \"comparison\"")
+	parser.add_argument("--quiet", action="store_true")
+	args = parser.parse_args()
+
+	report = run(args.sizes, args.generators, args.repeat, args.seed, args.max_edges, not args.no_memory, not args.no_networkx, args.quiet)
+
+	if args.compare:
+		with open(args.compare) as f:
+			report["comparison"] = compare(report, json.load(f))
+		if not args.quiet:
+			print("Time ratios against {} (below 1 is faster):".format(args.compare), file=sys.stderr)
+			for ratio in report["comparison"]:
+				print("{generator:>9} V={vertices:<8} {algorithm:<14} {implementation:<9} {ratio:8.3f}x".format(**ratio), file=sys.stderr)
+
+	if args.output:
+		with open(args.output, "w") as f:
+			json.dump(report, f, indent=2)
+	else:
+		json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,145 @@
+import os
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+# Views of the shared arrays, set up by _share in the parent and _attach in the workers
+_shared = {}
+
+
+def edge_arrays(graph) -> tuple:
+	"""
+	Returns (vertex count, sources, targets, weights) arrays for a Graph or CSRGraph
+	"""
+	if hasattr(graph, "sources"):
+		return len(graph.labels), graph.sources, graph.targets, graph.edge_weights
+
+	ids = {vertex: i for i, vertex in enumerate(graph.vertices)}
+	for node1, node2, weight in graph.edges:
+		ids.setdefault(node1, len(ids))
+		ids.setdefault(node2, len(ids))
+	sources = np.fromiter((ids[edge[0]] for edge in graph.edges), dtype=np.int64, count=len(graph.edges))
+	targets = np.fromiter((ids[edge[1]] for edge in graph.edges), dtype=np.int64, count=len(graph.edges))
+	weights = np.array([edge[2] for edge in graph.edges], dtype=float)
+	return len(ids), sources, targets, weights
+
+
+def _cheapest_in_shard(task: tuple) -> tuple:
+	"""
+	Finds the cheapest outgoing edge of every component among the edges lo..hi
+
+	The shared edges are sorted by weight, so the cheapest edge is the one with the smallest position.
+	"""
+	lo, hi, component_count = task
+	component = _shared["component"]
+	component1 = component[_shared["sources"][lo:hi]]
+	component2 = component[_shared["targets"][lo:hi]]
+	crossing = component1 != component2
+	positions = np.flatnonzero(crossing) + lo
+
+	cheapest = np.full(component_count, len(_shared["sources"]), dtype=np.int64)
+	np.minimum.at(cheapest, component1[crossing], positions)
+	np.minimum.at(cheapest, component2[crossing], positions)
+
+	components = np.flatnonzero(cheapest < len(_shared["sources"]))
+	return components, cheapest[components]
+
+
+def _attach(blocks: dict):
+	"""
+	Pool initializer that maps the shared memory blocks into NumPy arrays
+	"""
+	for name, (block_name, dtype, length) in blocks.items():
+		block = shared_memory.SharedMemory(name=block_name)
+		_shared[name + "_block"] = block
+		_shared[name] = np.ndarray((length,), dtype=dtype, buffer=block.buf)
+
+
+def _share(blocks: dict, name: str, array: np.ndarray) -> shared_memory.SharedMemory:
+	array = np.ascontiguousarray(array)
+	block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+	shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+	shared[:] = array
+	blocks[name] = (block.name, array.dtype.str, len(array))
+	_shared[name + "_block"] = block
+	_shared[name] = shared
+	return block
+
+
+def boruvka(vertex_count: int, sources, targets, weights, workers: int = None, shards_per_worker: int = 4) -> np.ndarray:
+	"""
+	Computes a minimum spanning forest with Borůvka's algorithm
+
+	Every round the edges are split into shards and a process pool finds the cheapest outgoing edge of each
+	component per shard. The cheapest edges are then merged and the components contracted with NumPy.
+	The edge and component arrays live in shared memory so workers never copy them.
+
+	:param workers: number of worker processes, defaults to the CPU count. With 1 everything runs in this process
+	:return: ids of the edges in the spanning forest, ascending
+	"""
+	workers = workers or os.cpu_count()
+	edge_count = len(sources)
+	shard_count = max(1, min(workers * shards_per_worker, edge_count))
+	bounds = np.linspace(0, edge_count, shard_count + 1).astype(np.int64)
+	shards = list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+	# Sorting by weight once, with ties kept in edge order, means the cheapest edge always has the smallest position
+	order = np.argsort(weights, kind="stable")
+	blocks = {}
+	owned = [
+		_share(blocks, "sources", np.asarray(sources)[order]),
+		_share(blocks, "targets", np.asarray(targets)[order]),
+		_share(blocks, "component", np.arange(vertex_count, dtype=np.int64))
+	]
+	pool = Pool(workers, initializer=_attach, initargs=(blocks,)) if workers > 1 else None
+
+	try:
+		component = _shared["component"]
+		component_count = vertex_count
+		tree = []
+		while True:
+			tasks = [(lo, hi, component_count) for lo, hi in shards]
+			results = pool.map(_cheapest_in_shard, tasks) if pool else [_cheapest_in_shard(task) for task in tasks]
+
+			cheapest = np.full(component_count, edge_count, dtype=np.int64)
+			for shard_components, shard_positions in results:
+				np.minimum.at(cheapest, shard_components, shard_positions)
+			components = np.flatnonzero(cheapest < edge_count)
+			if not len(components):
+				break
+			positions = cheapest[components]
+
+			# Hook every component onto the component across its cheapest edge. Positions are unique, so the only
+			# cycles are pairs choosing the same edge, where the smaller id becomes the root
+			component_ids = np.arange(component_count)
+			parent = component_ids.copy()
+			other = component[_shared["sources"][positions]]
+			other = np.where(other == components, component[_shared["targets"][positions]], other)
+			parent[components] = other
+			root = (parent[parent] == component_ids) & (component_ids < parent)
+			parent[root] = component_ids[root]
+			tree.append(order[positions[~root[components]]])
+
+			# Pointer jumping until every component points at its root
+			while True:
+				grandparent = parent[parent]
+				if np.array_equal(grandparent, parent):
+					break
+				parent = grandparent
+
+			roots, relabel = np.unique(parent, return_inverse=True)
+			component[:] = relabel[component]
+			component_count = len(roots)
+
+		return np.sort(np.concatenate(tree)) if tree else np.array([], dtype=np.int64)
+	finally:
+		component = None
+		if pool:
+			pool.close()
+			pool.join()
+		for name in blocks:
+			del _shared[name]
+			del _shared[name + "_block"]
+		for block in owned:
+			block.close()
+			block.unlink()
@@ -0,0 +1,388 @@
+import os
+import unittest
+import warnings
+from collections import deque
+from collections.abc import Sequence
+from typing import Union
+
+import networkx as nx
+import numpy as np
+
+from graphs import Graph, GraphError, Minimum_Spanning_Tree
+
+
+class EdgeView(Sequence):
+	"""
+	Read only view of the edges of a CSRGraph as [node1, node2, weight] lists, built on demand
+	"""
+	def __init__(self, graph):
+		self.graph = graph
+
+	def __len__(self) -> int:
+		return len(self.graph.sources)
+
+	def __getitem__(self, index):
+		if isinstance(index, slice):
+			return [self[i] for i in range(*index.indices(len(self)))]
+		if isinstance(index, (list, np.ndarray)):
+			return list(self.graph._iter_edges(np.asarray(index, dtype=np.int64)))
+		return self.graph._edge(index)
+
+	def __iter__(self):
+		return self.graph._iter_edges(np.arange(len(self)))
+
+
+class CSRGraph:
+	"""
+	Undirected weighted graph stored in compressed sparse row form
+
+	Vertices are the integer ids 0..V-1 with labels[i] holding the original label of vertex i.
+	The neighbours of vertex i are indices[indptr[i]:indptr[i + 1]] with matching weights, and edge_ids maps every
+	slot back to the undirected edge (sources[e], targets[e], edge_weights[e]) it came from.
+	The arrays can be memory mapped, so none of them are modified after construction.
+	"""
+	ARRAYS = ("indptr", "indices", "weights", "edge_ids", "sources", "targets", "edge_weights")
+	CHUNK = 1 << 16
+	# The arrays are never modified, so the graph never goes stale
+	version = 0
+
+	def __init__(self, labels, sources, targets, edge_weights, **csr):
+		self.labels = np.asarray(labels)
+		self.sources = sources
+		self.targets = targets
+		self.edge_weights = edge_weights
+		self._ids = None
+
+		if csr:
+			for name in ("indptr", "indices", "weights", "edge_ids"):
+				setattr(self, name, csr[name])
+		else:
+			self._build_rows()
+
+	def _build_rows(self):
+		n, m = len(self.labels), len(self.sources)
+		id_type = self.sources.dtype
+
+		# Every edge fills a slot in the rows of both endpoints, self loops only once
+		loops = self.sources == self.targets
+		ends = np.concatenate([self.sources, self.targets[~loops]])
+		others = np.concatenate([self.targets, self.sources[~loops]])
+		edge_ids = np.concatenate([np.arange(m, dtype=id_type), np.flatnonzero(~loops).astype(id_type)])
+
+		# Within a row keep the edges in their original order, like Graph's adjacency index
+		order = np.lexsort((edge_ids, ends))
+		self.indptr = np.zeros(n + 1, dtype=np.int64)
+		np.cumsum(np.bincount(ends, minlength=n), out=self.indptr[1:])
+		self.indices = others[order]
+		self.edge_ids = edge_ids[order]
+		self.weights = self.edge_weights[self.edge_ids]
+
+	@staticmethod
+	def _id_type(n: int, m: int):
+		return np.int32 if max(n, m) < np.iinfo(np.int32).max else np.int64
+
+	@classmethod
+	def from_arrays(cls, sources, targets, weights=None, labels=None):
+		"""
+		Builds a graph from parallel arrays of edge endpoints (integer ids) and weights
+		"""
+		sources, targets = np.asarray(sources), np.asarray(targets)
+		if len(sources) != len(targets):
+			raise GraphError("Sources and targets must have the same length")
+
+		if labels is None:
+			n = int(max(sources.max(initial=-1), targets.max(initial=-1))) + 1
+			labels = np.arange(n)
+		n, m = len(labels), len(sources)
+
+		id_type = cls._id_type(n, m)
+		weights = np.ones(m) if weights is None else np.asarray(weights)
+		return cls(labels, sources.astype(id_type, copy=False), targets.astype(id_type, copy=False), weights)
+
+	@classmethod
+	def from_edge_list(cls, path: str, label_type: type = int, comments: str = "#"):
+		"""
+		Loads a whitespace separated edge list file with lines of "node1 node2 [weight]"
+
+		Labels are parsed as label_type and numbered in sorted order. Missing weights default to 1. Integer and float
+		labels are parsed straight into NumPy columns, without a Python string per field.
+		"""
+		columns = cls._count_columns(path, comments)
+		if columns not in (2, 3):
+			raise GraphError("Edge list lines must have 2 or 3 columns")
+
+		with warnings.catch_warnings():
+			# NumPy warns about comment lines when reading strings in chunks
+			warnings.simplefilter("ignore", UserWarning)
+			if label_type in (int, float):
+				label_dtype = np.int64 if label_type is int else np.float64
+				fields = [("node1", label_dtype), ("node2", label_dtype)] + [("weight", np.float64)] * (columns == 3)
+				data = np.loadtxt(path, dtype=fields, comments=comments, ndmin=1)
+				endpoints = np.stack([data["node1"], data["node2"]], axis=1)
+				weights = data["weight"] if columns == 3 else None
+			else:
+				endpoints = np.loadtxt(path, dtype=str, comments=comments, usecols=(0, 1), ndmin=2)
+				weights = np.loadtxt(path, dtype=np.float64, comments=comments, usecols=2, ndmin=1) if columns == 3 else None
+
+		labels, inverse = np.unique(endpoints, return_inverse=True)
+		inverse = inverse.reshape(endpoints.shape)
+
+		return cls.from_arrays(inverse[:, 0], inverse[:, 1], weights, labels)
+
+	@staticmethod
+	def _count_columns(path: str, comments: str) -> int:
+		with open(path) as f:
+			for line in f:
+				fields = line.split(comments, 1)[0].split()
+				if fields:
+					return len(fields)
+		return 2
+
+	@classmethod
+	def from_npy(cls, sources_path: str, targets_path: str, weights_path: str = None, labels_path: str = None):
+		"""
+		Builds a graph from .npy edge arrays, which are memory mapped rather than read into memory
+		"""
+		load = lambda path: None if path is None else np.load(path, mmap_mode="r")
+		return cls.from_arrays(load(sources_path), load(targets_path), load(weights_path), load(labels_path))
+
+	@classmethod
+	def load(cls, directory: str, mmap_mode: str = "r"):
+		"""
+		Loads a graph written by save, memory mapping its arrays
+		"""
+		arrays = {name: np.load(os.path.join(directory, name + ".npy"), mmap_mode=mmap_mode) for name in cls.ARRAYS}
+		labels = np.load(os.path.join(directory, "labels.npy"), mmap_mode=mmap_mode)
+		csr = {name: arrays[name] for name in ("indptr", "indices", "weights", "edge_ids")}
+		return cls(labels, arrays["sources"], arrays["targets"], arrays["edge_weights"], **csr)
+
+	def save(self, directory: str):
+		"""
+		Writes every array of the graph to its own .npy file in directory
+		"""
+		os.makedirs(directory, exist_ok=True)
+		for name in self.ARRAYS:
+			np.save(os.path.join(directory, name + ".npy"), getattr(self, name))
+		np.save(os.path.join(directory, "labels.npy"), self._plain_labels())
+
+	def _plain_labels(self) -> np.ndarray:
+		"""
+		Returns the labels as an int, float or string array, which can be saved without pickling
+		"""
+		if self.labels.dtype != object:
+			return self.labels
+		labels = self.labels.tolist()
+		plain = np.array(labels)
+		if plain.dtype.kind not in "iufU" or plain.tolist() != labels:
+			raise GraphError("Only int, float or string labels of a single type can be saved")
+		return plain
+
+	@classmethod
+	def from_graph(cls, graph: Graph):
+		"""
+		Converts a Graph, keeping its vertex and edge order
+		"""
+		return cls._from_vertices_and_edges(graph.vertices, graph.edges)
+
+	@classmethod
+	def from_networkx(cls, nx_graph: nx.Graph, weight: str = "weight"):
+		"""
+		Converts a networkx graph such as the one returned by Graph.parse_graph
+		"""
+		edges = [[node1, node2, data.get(weight, 1)] for node1, node2, data in nx_graph.edges(data=True)]
+		return cls._from_vertices_and_edges(list(nx_graph.nodes), edges)
+
+	@classmethod
+	def _from_vertices_and_edges(cls, vertices: list, edges: list):
+		labels = np.empty(len(vertices), dtype=object)
+		labels[:] = vertices
+		ids = {vertex: i for i, vertex in enumerate(vertices)}
+		try:
+			sources = np.fromiter((ids[edge[0]] for edge in edges), dtype=np.int64, count=len(edges))
+			targets = np.fromiter((ids[edge[1]] for edge in edges), dtype=np.int64, count=len(edges))
+		except KeyError as e:
+			raise GraphError("Edge endpoint {} not found in graph".format(e))
+		weights = np.array([edge[2] for edge in edges])
+
+		graph = cls.from_arrays(sources, targets, weights if len(edges) else None, labels)
+		graph._ids = ids
+		return graph
+
+	def to_graph(self) -> Graph:
+		"""
+		Converts back to a list based Graph
+		"""
+		return Graph(self.vertices, list(self.edges))
+
+	def parse_graph(self) -> nx.Graph:
+		"""
+		Converts the existing graph to networkx format
+		"""
+		nx_graph = nx.Graph()
+		nx_graph.add_nodes_from(self.vertices)
+		nx_graph.add_weighted_edges_from(self.edges)
+		return nx_graph
+
+	@property
+	def vertices(self) -> list:
+		return self.labels.tolist()
+
+	@property
+	def edges(self) -> EdgeView:
+		return EdgeView(self)
+
+	def vertex_id(self, label: Union[str, int]) -> int:
+		"""
+		Returns the integer id of the vertex with the given label
+		"""
+		if self._ids is None:
+			self._ids = {label: i for i, label in enumerate(self.labels.tolist())}
+		if label not in self._ids:
+			raise GraphError("Vertex {} not found in graph".format(label))
+		return self._ids[label]
+
+	def _edge(self, edge_id: int) -> list:
+		node1, node2 = self.labels[[self.sources[edge_id], self.targets[edge_id]]].tolist()
+		return [node1, node2, self.edge_weights[edge_id].item()]
+
+	def _iter_edges(self, edge_ids):
+		for start in range(0, len(edge_ids), self.CHUNK):
+			chunk = edge_ids[start:start + self.CHUNK]
+			node1s = self.labels[self.sources[chunk]].tolist()
+			node2s = self.labels[self.targets[chunk]].tolist()
+			weights = self.edge_weights[chunk].tolist()
+			for edge in zip(node1s, node2s, weights):
+				yield list(edge)
+
+	def edges_by_weight(self):
+		"""
+		Yields the edges sorted by weight, ties kept in edge order
+		"""
+		return self._iter_edges(np.argsort(self.edge_weights, kind="stable"))
+
+	def degree(self, cur: Union[str, int]) -> int:
+		i = self.vertex_id(cur)
+		return int(self.indptr[i + 1] - self.indptr[i])
+
+	def neighbour_ids(self, i: int):
+		"""
+		Returns the ids of the vertices adjacent to vertex id i
+		"""
+		return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+	def get_neighbour_edges(self, cur: Union[str, int]) -> list:
+		"""
+		Returns a list of neighbouring edges that are adjacent to cur
+		"""
+		i = self.vertex_id(cur)
+		return list(self._iter_edges(self.edge_ids[self.indptr[i]:self.indptr[i + 1]]))
+
+	def get_neighbour_vertices(self, cur: Union[str, int]) -> list:
+		"""
+		Returns a list of neighbouring vertices that are adjacent to cur
+		"""
+		return self.labels[self.neighbour_ids(self.vertex_id(cur))].tolist()
+
+	def is_connected(self, start: Union[str, int], end: Union[str, int]) -> bool:
+		"""
+		Checks if there is a path from start to end using breadth first search over the vertex ids
+		"""
+		start, end = self.vertex_id(start), self.vertex_id(end)
+
+		visited = np.zeros(len(self.labels), dtype=bool)
+		visited[start] = True
+		queue = deque([start])
+
+		while queue:
+			cur = queue.popleft()
+
+			if cur == end:
+				return True
+
+			neighbours = self.neighbour_ids(cur)
+			neighbours = neighbours[~visited[neighbours]]
+			visited[neighbours] = True
+			queue.extend(neighbours.tolist())
+
+		return False
+
+	def duplicate(self):
+		"""
+		Returns a duplicate of the current graph
+		"""
+		csr = {name: np.array(getattr(self, name)) for name in ("indptr", "indices", "weights", "edge_ids")}
+		return CSRGraph(self.labels.copy(), np.array(self.sources), np.array(self.targets), np.array(self.edge_weights), **csr)
+
+	@property
+	def nbytes(self) -> int:
+		return sum(getattr(self, name).nbytes for name in self.ARRAYS)
+
+	def __repr__(self):
+		return "<CSRGraph vertices={} edges={}>".format(len(self.labels), len(self.sources))
+
+
+class Test_CSR_Graph(unittest.TestCase):
+	def setUp(self):
+		vertices = ["Minneapolis", "Milwaukee", "Chicago", "St. Louis", "Detroit", "Cincinnati", "Louisville", "Nashville"]
+		edges = [
+			["Minneapolis", "Chicago", 355],
+			["Minneapolis", "Nashville", 695],
+			["Milwaukee", "Chicago", 74],
+			["Milwaukee", "Louisville", 348],
+			["Chicago", "Louisville", 269],
+			["Chicago", "St. Louis", 262],
+			["St. Louis", "Louisville", 242],
+			["Nashville", "Louisville", 151],
+			["Louisville", "Cincinnati", 83],
+			["Louisville", "Detroit", 306],
+			["Cincinnati", "Detroit", 230]
+		]
+		self.graph = Graph(vertices, edges)
+		self.csr_graph = CSRGraph.from_graph(self.graph)
+
+	def test_round_trip(self):
+		self.assertEqual(self.csr_graph.to_graph().vertices, self.graph.vertices)
+		self.assertEqual(list(self.csr_graph.edges), self.graph.edges)
+		self.assertEqual(list(CSRGraph.from_networkx(self.graph.parse_graph()).parse_graph().edges(data=True)), list(self.graph.parse_graph().edges(data=True)))
+
+	def test_neighbours(self):
+		for vertex in self.graph.vertices:
+			self.assertEqual(self.csr_graph.get_neighbour_edges(vertex), self.graph.get_neighbour_edges(vertex))
+		self.assertTrue(self.csr_graph.is_connected("Minneapolis", "Detroit"))
+
+	def test_min_span_tree(self):
+		expected = Minimum_Spanning_Tree(self.graph)
+		result = Minimum_Spanning_Tree(self.csr_graph)
+		self.assertEqual(result.kruskal_solve().edges, expected.kruskal_solve().edges)
+		self.assertEqual(result.prim_solve().edges, expected.prim_solve().edges)
+
+	def test_edge_list_file(self):
+		import tempfile
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, "edges.txt")
+			with open(path, "w") as f:
+				f.write("# road network\n10 2 1.5\n2 7 0.5\n7 10 2\n3 3 1\n")
+
+			graph = CSRGraph.from_edge_list(path)
+			self.assertEqual(graph.vertices, [2, 3, 7, 10])
+			self.assertEqual(graph.get_neighbour_vertices(3), [3])
+			self.assertFalse(graph.is_connected(2, 3))
+
+			graph.save(directory)
+			loaded = CSRGraph.load(directory)
+			self.assertIsInstance(loaded.indices, np.memmap)
+			self.assertEqual(loaded.labels.dtype, np.int64)
+			self.assertEqual(list(loaded.edges), list(graph.edges))
+
+			with open(path, "w") as f:
+				f.write("a b\nb c\n")
+			graph = CSRGraph.from_edge_list(path, label_type=str)
+			self.assertEqual(graph.vertices, ["a", "b", "c"])
+			self.assertEqual(list(graph.edges), [["a", "b", 1.0], ["b", "c", 1.0]])
+
+			self.csr_graph.save(directory)
+			self.assertEqual(CSRGraph.load(directory).vertices, self.graph.vertices)
+
+
+if __name__ == '__main__':
+	unittest.main(verbosity=2)
@@ -1,76 +1,541 @@
 import networkx as nx
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
 import unittest
+import heapq
+import random
+from collections import OrderedDict, deque
 from typing import Union
 
 
+# Spring layouts take minutes on large graphs, so those are down-sampled before drawing
+MAX_DRAWN_VERTICES = 400
+MAX_LABELLED_VERTICES = 100
+LAYOUT_CACHE_SIZE = 8
+_layout_cache = OrderedDict()
+
+
 class GraphError(Exception):
 	pass
 
 
+class DisjointSet:
+	"""
+	Union-find over arbitrary hashable items using union by rank and path compression
+	"""
+	def __init__(self, items: list = ()):
+		self.parent = {}
+		self.rank = {}
+		self.count = 0
+		for item in items:
+			self.add(item)
+
+	def __contains__(self, item) -> bool:
+		return item in self.parent
+
+	def add(self, item: Union[str, int]):
+		if item not in self.parent:
+			self.parent[item] = item
+			self.rank[item] = 0
+			self.count += 1
+
+	def find(self, item: Union[str, int]) -> Union[str, int]:
+		"""
+		Returns the representative of the set containing item
+		"""
+		root = item
+		while self.parent[root] != root:
+			root = self.parent[root]
+
+		# Path compression
+		while self.parent[item] != root:
+			self.parent[item], item = root, self.parent[item]
+
+		return root
+
+	def union(self, item1: Union[str, int], item2: Union[str, int]) -> bool:
+		"""
+		Merges the sets containing item1 and item2, returns False if they were already merged
+		"""
+		root1, root2 = self.find(item1), self.find(item2)
+		if root1 == root2:
+			return False
+
+		if self.rank[root1] < self.rank[root2]:
+			root1, root2 = root2, root1
+		self.parent[root2] = root1
+		if self.rank[root1] == self.rank[root2]:
+			self.rank[root1] += 1
+		self.count -= 1
+
+		return True
+
+
+class IndexedHeap:
+	"""
+	Binary min heap of unique items that supports decreasing the key of an item already in the heap
+	"""
+	def __init__(self):
+		self.heap = []
+		self.position = {}
+
+	def __len__(self) -> int:
+		return len(self.heap)
+
+	def __contains__(self, item) -> bool:
+		return item in self.position
+
+	def push(self, item, key) -> bool:
+		"""
+		Inserts item, or lowers its key if it is already in the heap. Returns True if the heap changed
+		"""
+		if item in self.position:
+			i = self.position[item]
+			if not key < self.heap[i][0]:
+				return False
+			self.heap[i] = (key, item)
+		else:
+			i = len(self.heap)
+			self.heap.append((key, item))
+		self._sift_up(i)
+		return True
+
+	def pop(self) -> tuple:
+		"""
+		Removes and returns the (key, item) pair with the smallest key
+		"""
+		last = self.heap.pop()
+		if not self.heap:
+			del self.position[last[1]]
+			return last
+
+		top = self.heap[0]
+		del self.position[top[1]]
+		self.heap[0] = last
+		self._sift_down(0)
+		return top
+
+	def _sift_up(self, i: int):
+		entry = self.heap[i]
+		while i > 0:
+			parent = (i - 1) // 2
+			if not entry[0] < self.heap[parent][0]:
+				break
+			self.heap[i] = self.heap[parent]
+			self.position[self.heap[i][1]] = i
+			i = parent
+		self.heap[i] = entry
+		self.position[entry[1]] = i
+
+	def _sift_down(self, i: int):
+		entry = self.heap[i]
+		size = len(self.heap)
+		while True:
+			child = 2 * i + 1
+			if child >= size:
+				break
+			if child + 1 < size and self.heap[child + 1][0] < self.heap[child][0]:
+				child += 1
+			if not self.heap[child][0] < entry[0]:
+				break
+			self.heap[i] = self.heap[child]
+			self.position[self.heap[i][1]] = i
+			i = child
+		self.heap[i] = entry
+		self.position[entry[1]] = i
+
+
+class EdgeList(list):
+	"""
+	A list of edges that keeps the adjacency index of its graph in sync
+
+	append/extend/remove/pop/clear update the index incrementally, any other
+	in-place mutation (insert, slice assignment, sort, ...) rebuilds it.
+	Edges themselves should not be mutated in place.
+	"""
+	def __init__(self, graph, edges=()):
+		super().__init__(edges)
+		self._graph = graph
+
+	def append(self, edge):
+		super().append(edge)
+		self._graph._index_edge(edge)
+
+	def extend(self, edges):
+		for edge in edges:
+			self.append(edge)
+
+	def remove(self, edge):
+		self.pop(self.index(edge))
+
+	def pop(self, index=-1):
+		edge = super().pop(index)
+		self._graph._unindex_edge(edge)
+		return edge
+
+	def clear(self):
+		super().clear()
+		self._graph._rebuild_index()
+
+	def __reduce__(self):
+		# Copies and pickles are detached from the graph
+		return list, (list(self),)
+
+	def _mutate_and_rebuild(name):
+		def mutator(self, *args, **kwargs):
+			result = getattr(super(EdgeList, self), name)(*args, **kwargs)
+			self._graph._rebuild_index()
+			return result
+		mutator.__name__ = name
+		return mutator
+
+	insert = _mutate_and_rebuild("insert")
+	sort = _mutate_and_rebuild("sort")
+	reverse = _mutate_and_rebuild("reverse")
+	__setitem__ = _mutate_and_rebuild("__setitem__")
+	__delitem__ = _mutate_and_rebuild("__delitem__")
+	__iadd__ = _mutate_and_rebuild("__iadd__")
+	__imul__ = _mutate_and_rebuild("__imul__")
+	del _mutate_and_rebuild
+
+
 class Graph:
 	def __init__(self, vertices: list, edges: list):
 		self.vertices = vertices
+		self._track_components = False
 		self.edges = edges
 
+	@property
+	def edges(self) -> EdgeList:
+		return self._edges
+
+	@edges.setter
+	def edges(self, edges: list):
+		self._edges = EdgeList(self, edges)
+		self._rebuild_index()
+
+	def __getstate__(self):
+		state = self.__dict__.copy()
+		state["_edges"] = list(self._edges)
+		del state["_adjacency"]
+		return state
+
+	def __setstate__(self, state):
+		edges = state.pop("_edges")
+		self.__dict__.update(state)
+		self.edges = edges
+
+	def _rebuild_index(self):
+		"""
+		Rebuilds the adjacency index from scratch
+		"""
+		# version changes whenever the edges do, so anything derived from them can tell it is stale
+		self.version = getattr(self, "version", 0) + 1
+		self._adjacency = {}
+		self._components = None
+		for edge in self._edges:
+			self._index_edge(edge)
+
+	def _index_edge(self, edge: list):
+		self.version += 1
+		node1, node2 = edge[0], edge[1]
+		self._adjacency.setdefault(node1, []).append(edge)
+		if node2 != node1:
+			self._adjacency.setdefault(node2, []).append(edge)
+
+		if self._components is not None:
+			self._components.add(node1)
+			self._components.add(node2)
+			self._components.union(node1, node2)
+
+	def _unindex_edge(self, edge: list):
+		self.version += 1
+		node1, node2 = edge[0], edge[1]
+		for node in (node1, node2) if node2 != node1 else (node1,):
+			adjacent = self._adjacency[node]
+			# Remove by identity so that duplicate edges are kept apart
+			for i, other in enumerate(adjacent):
+				if other is edge:
+					del adjacent[i]
+					break
+
+		# A disjoint set cannot split, so it is rebuilt on the next query
+		self._components = None
+
 	def get_neighbour_edges(self, cur: Union[str, int]) -> list:
 		"""
 		Returns a list of neighbouring edges that are adjacent to cur
 		"""
-		return [edge for edge in self.edges if cur in edge]
+		return list(self._adjacency.get(cur, ()))
 
 	def get_neighbour_vertices(self, cur: Union[str, int]) -> list:
 		"""
 		Returns a list of neighbouring vertices that are adjacent to cur
 		"""
-		vertices = [edge[0] if edge[1] == cur else edge[1] for edge in self.get_neighbour_edges(cur)]
+		vertices = [edge[0] if edge[1] == cur else edge[1] for edge in self._adjacency.get(cur, ())]
 		return vertices
 
+	def track_components(self, enabled: bool = True):
+		"""
+		Keeps a disjoint set of the connected components that is updated as edges are added
+
+		is_connected, component and component_count then run in near constant time. Removing an edge discards
+		the disjoint set and it is rebuilt by the next query.
+		"""
+		self._track_components = enabled
+		if not enabled:
+			self._components = None
+
+	def _get_components(self) -> DisjointSet:
+		"""
+		Returns the disjoint set of the connected components, building it if needed
+		"""
+		if self._components is not None and len(self.vertices) < self._components_synced:
+			self._components = None
+
+		if self._components is None:
+			components = DisjointSet(self.vertices)
+			for node1, node2, *weight in self._edges:
+				components.add(node1)
+				components.add(node2)
+				components.union(node1, node2)
+		else:
+			# Vertices can be appended to the vertex list directly
+			components = self._components
+			for vertex in self.vertices[self._components_synced:]:
+				components.add(vertex)
+
+		self._components_synced = len(self.vertices)
+		if self._track_components:
+			self._components = components
+		return components
+
+	def component(self, vertex: Union[str, int]) -> Union[str, int]:
+		"""
+		Returns a representative vertex of the connected component containing vertex
+		"""
+		components = self._get_components()
+		if vertex not in components:
+			raise GraphError("Vertex not found in graph")
+		return components.find(vertex)
+
+	def component_count(self) -> int:
+		"""
+		Returns the number of connected components
+		"""
+		return self._get_components().count
+
 	def is_connected(self, start: Union[str, int], end: Union[str, int]) -> bool:
 		"""
-		Returns a duplicate of the current graph
+		Checks if there is a path from start to end using breadth first search, or the component index if tracked
 		"""
+		if self._track_components:
+			components = self._get_components()
+			if start not in components or end not in components:
+				raise GraphError("Start or end not found in graph")
+			return components.find(start) == components.find(end)
+
 		if start not in self.vertices or end not in self.vertices:
 			raise GraphError("Start or end not found in graph")
 
-		visited = dict(zip(self.vertices, [False] * len(self.vertices)))
-		queue = []
-		queue.append(start)
-		visited[start] = True
+		visited = {start}
+		queue = deque([start])
 
 		while queue:
-			cur = queue.pop(0)
+			cur = queue.popleft()
 
 			if cur == end:
 				return True
 
-			neighbours = self.get_neighbour_vertices(cur)
-			for neighbour in neighbours:
-				if not visited[neighbour]:
+			for neighbour in self.get_neighbour_vertices(cur):
+				if neighbour not in visited:
 					queue.append(neighbour)
-					visited[neighbour] = True
+					visited.add(neighbour)
 
 		return False
 
+	def _odd_vertices(self) -> list:
+		"""
+		Returns the vertices of odd degree if an Euler path exists, raises a GraphError otherwise
+		"""
+		degree = {}
+		for node1, node2, *weight in self._edges:
+			degree[node1] = degree.get(node1, 0) + 1
+			degree[node2] = degree.get(node2, 0) + 1
+
+		odd = [vertex for vertex, count in degree.items() if count % 2]
+		if len(odd) not in (0, 2):
+			raise GraphError("{} vertices have an odd degree, there is no Euler path".format(len(odd)))
+
+		# Every edge has to be reachable from every other edge
+		components = self._get_components()
+		if len({components.find(vertex) for vertex in degree}) > 1:
+			raise GraphError("The edges are not connected, there is no Euler path")
+
+		return odd
+
+	def has_euler_path(self) -> bool:
+		"""
+		Checks if there is a trail that uses every edge exactly once
+		"""
+		try:
+			self._odd_vertices()
+		except GraphError:
+			return False
+		return True
+
+	def has_euler_circuit(self) -> bool:
+		"""
+		Checks if there is a trail that uses every edge exactly once and ends where it started
+		"""
+		try:
+			return not self._odd_vertices()
+		except GraphError:
+			return False
+
+	def iter_euler_path(self, start: Union[str, int] = None):
+		"""
+		Returns a generator of the edges of an Euler path (or circuit) as [from, to, weight], in trail order
+
+		Uses Hierholzer's algorithm in O(E), finished edges are yielded straight away instead of being collected.
+		If given, the trail starts at start, which has to be a vertex of odd degree when there is no circuit.
+		The edges must not be changed while the generator is running.
+		"""
+		odd = self._odd_vertices()
+		if not self._edges:
+			return iter(())
+
+		if odd:
+			if start is None:
+				start = odd[0]
+			elif start not in odd:
+				raise GraphError("An Euler path has to start at a vertex of odd degree")
+			# The trail is yielded from the vertex where the search gets stuck, which is the other odd vertex
+			begin = odd[1] if start == odd[0] else odd[0]
+		else:
+			if start is None:
+				start = self._edges[0][0]
+			elif start not in self._adjacency or not self._adjacency[start]:
+				raise GraphError("An Euler circuit cannot start at a vertex without edges")
+			begin = start
+
+		return self._hierholzer(begin)
+
+	def _hierholzer(self, begin: Union[str, int]):
+		edges = list(self._edges)
+		incidence = {}
+		for i, (node1, node2, *weight) in enumerate(edges):
+			incidence.setdefault(node1, []).append(i)
+			if node2 != node1:
+				incidence.setdefault(node2, []).append(i)
+
+		# Every vertex keeps a cursor into its incident edges, so each edge is looked at a constant number of times
+		cursor = dict.fromkeys(incidence, 0)
+		used = bytearray(len(edges))
+		stack = [(begin, None)]
+
+		while stack:
+			cur, arrived_by = stack[-1]
+			incident = incidence[cur]
+			i = cursor[cur]
+			while i < len(incident) and used[incident[i]]:
+				i += 1
+			cursor[cur] = i
+
+			if i < len(incident):
+				edge_id = incident[i]
+				used[edge_id] = True
+				edge = edges[edge_id]
+				stack.append((edge[0] if edge[1] == cur else edge[1], edge_id))
+			else:
+				stack.pop()
+				if arrived_by is not None:
+					yield [cur, stack[-1][0], edges[arrived_by][2]]
+
+	def get_euler_path(self, start: Union[str, int] = None) -> list:
+		"""
+		Returns the edges of an Euler path (or circuit) as [from, to, weight], in trail order
+		"""
+		return list(self.iter_euler_path(start))
+
 	def duplicate(self):
 		"""
 		Returns a duplicate of the current graph
 		"""
 		return Graph(self.vertices[:], self.edges[:])
 
-	def draw(self):
+	def layout(self, max_nodes: int = MAX_DRAWN_VERTICES, seed: int = 0) -> dict:
 		"""
-		Draws the graph using networkx and matplotlib
+		Returns spring layout positions for the vertices, down-sampled to at most max_nodes vertices
+
+		Layouts are cached by vertex set, so graphs on the same vertices (like a minimum spanning tree) get the same one.
+		"""
+		key = (frozenset(self.vertices), max_nodes, seed)
+		if key in _layout_cache:
+			_layout_cache.move_to_end(key)
+			return _layout_cache[key]
+
+		vertices = self.vertices
+		if max_nodes is not None and len(vertices) > max_nodes:
+			vertices = random.Random(seed).sample(vertices, max_nodes)
+
+		nx_graph = self._drawn_graph(dict.fromkeys(vertices))
+		pos = nx.spring_layout(nx_graph, k=0.15, iterations=20, seed=seed) # to spread out the nodes
+
+		_layout_cache[key] = pos
+		if len(_layout_cache) > LAYOUT_CACHE_SIZE:
+			_layout_cache.popitem(last=False)
+		return pos
+
+	def _drawn_graph(self, vertices: dict) -> nx.Graph:
+		"""
+		Returns the networkx graph induced by the given vertices
 		"""
-		nx_graph = self.parse_graph()
-		pos = nx.spring_layout(nx_graph, k=0.15, iterations=20) # to spread out the nodes
+		nx_graph = nx.Graph()
+		nx_graph.add_nodes_from(vertices)
+		nx_graph.add_weighted_edges_from(edge for edge in self.edges if edge[0] in vertices and edge[1] in vertices)
+		return nx_graph
 
-		nx.draw(nx_graph, pos, edge_color="black", width=1, linewidths=1, node_size=500, node_color="pink", alpha=0.9, with_labels=True)
+	def draw(self, path: str = None, pos: dict = None, ax=None, max_nodes: int = MAX_DRAWN_VERTICES, seed: int = 0) -> dict:
+		"""
+		Draws the graph using networkx and matplotlib
 
-		edge_labels = {(edge[0], edge[1]):edge[2] for edge in self.edges}
-		nx.draw_networkx_edge_labels(nx_graph, pos, edge_labels=edge_labels, font_color='red')
+		Only the vertices in pos are drawn, by default the cached layout. Graphs with more than MAX_LABELLED_VERTICES vertices
+		are drawn without labels using matplotlib collections. The drawing goes to ax if given, otherwise it is saved to
+		path, which needs no display, or shown.
 
-		plt.show()
+		:return: returns the positions used, to draw related graphs with the same layout
+		"""
+		if pos is None:
+			pos = self.layout(max_nodes, seed)
+
+		if ax is not None:
+			self._draw_on(ax, pos)
+		elif path is not None:
+			figure = Figure(figsize=(10, 10))
+			self._draw_on(figure.subplots(), pos)
+			figure.savefig(path)
+		else:
+			self._draw_on(plt.figure(figsize=(10, 10)).subplots(), pos)
+			plt.show()
+
+		return pos
+
+	def _draw_on(self, ax, pos: dict):
+		if len(pos) > MAX_LABELLED_VERTICES:
+			segments = [(pos[node1], pos[node2]) for node1, node2, weight in self.edges if node1 in pos and node2 in pos]
+			ax.add_collection(LineCollection(segments, colors="black", linewidths=0.3, alpha=0.5))
+			ax.scatter([x for x, y in pos.values()], [y for x, y in pos.values()], s=4, c="pink", zorder=2)
+			ax.autoscale()
+			ax.set_axis_off()
+			return
+
+		nx_graph = self._drawn_graph(pos)
+		nx.draw(nx_graph, pos, ax=ax, edge_color="black", width=1, linewidths=1, node_size=500, node_color="pink", alpha=0.9, with_labels=True)
+
+		edge_labels = {(edge[0], edge[1]):edge[2] for edge in self.edges if edge[0] in pos and edge[1] in pos}
+		nx.draw_networkx_edge_labels(nx_graph, pos, ax=ax, edge_labels=edge_labels, font_color='red')
 
 	def parse_graph(self):
 		"""
@@ -96,52 +561,112 @@ class Minimum_Spanning_Tree:
 		self.graph = graph
 
 	def kruskal_solve(self):
-		"""Obtain a minimum spanning tree from the connected graph using Kruskal's Algorithm"""
+		"""
+		Obtain a minimum spanning tree from the graph using Kruskal's Algorithm
+
+		Cycles are detected with a disjoint set. If the graph is disconnected a minimum spanning forest is returned.
+		"""
 
 		min_span_tree = Graph(self.graph.vertices, [])
-		edges = sorted(self.graph.edges[:], key=lambda x: x[2])
-		count = 0
+		components = DisjointSet(self.graph.vertices)
+		target = len(self.graph.vertices) - 1
+
+		if hasattr(self.graph, "edges_by_weight"):
+			edges = self.graph.edges_by_weight()
+		else:
+			edges = sorted(self.graph.edges, key=lambda x: x[2])
+
+		for cur_edge in edges:
+			if len(min_span_tree.edges) >= target:
+				break
 
-		while count < len(self.graph.vertices) - 1:
-			cur_edge = edges[0]
-			edges = edges[1:]
-			
 			node1, node2, weight = cur_edge
-			if not min_span_tree.is_connected(node1, node2):
+			components.add(node1)
+			components.add(node2)
+			if components.union(node1, node2):
 				min_span_tree.edges.append(cur_edge)
-				count = count + 1
 
 		return min_span_tree
 
-	def prim_solve(self):
-		"""Obtain a minimum spanning tree from the connected graph using Prim's Algorithm"""
-
-		min_span_tree = Graph([self.graph.vertices[0]], [])
-		dup_graph = self.graph.duplicate()
-
-		for i in range(len(self.graph.vertices) - 1):
-			neighbour_edges = []
-			for cur in min_span_tree.vertices:
-				neighbour_edges += dup_graph.get_neighbour_edges(cur)
+	def prim_solve(self, indexed_heap: bool = False):
+		"""
+		Obtain a minimum spanning tree from the graph using Prim's Algorithm
 
-			neighbour_edges.sort(key=lambda x: x[2])
-			shortest_edge = neighbour_edges[0]
-			new_node = shortest_edge[0] if shortest_edge[1] in min_span_tree.vertices else shortest_edge[1]
+		Crossing edges are kept in a binary heap. By default stale entries are skipped when popped (lazy deletion),
+		with indexed_heap=True each outside vertex keeps only its cheapest edge and is updated with decrease-key.
+		Ties are broken by the order the tree vertices were added in, then by edge order, so the result matches
+		the textbook scan over the neighbour edges of every tree vertex.
+		If the graph is disconnected a minimum spanning forest is returned.
+		"""
 
-			min_span_tree.edges.append(shortest_edge)
-			min_span_tree.vertices.append(new_node)
-			dup_graph.edges.remove(shortest_edge)
+		min_span_tree = Graph([], [])
+		visited = set()
+		heap = IndexedHeap() if indexed_heap else []
+
+		def add_vertex(cur):
+			order = len(min_span_tree.vertices)
+			min_span_tree.vertices.append(cur)
+			visited.add(cur)
+			for rank, edge in enumerate(self.graph.get_neighbour_edges(cur)):
+				new_node = edge[0] if edge[1] == cur else edge[1]
+				if new_node in visited:
+					continue
+				key = (edge[2], order, rank)
+				if indexed_heap:
+					heap.push(new_node, (key, edge))
+				else:
+					heapq.heappush(heap, (key, new_node, edge))
+
+		for root in self.graph.vertices:
+			if root in visited:
+				continue
+			add_vertex(root)
+
+			while heap:
+				if indexed_heap:
+					(key, shortest_edge), new_node = heap.pop()
+				else:
+					key, new_node, shortest_edge = heapq.heappop(heap)
+					if new_node in visited:
+						continue
+
+				min_span_tree.edges.append(shortest_edge)
+				add_vertex(new_node)
 
 		return min_span_tree
 
-	def draw_min_span_tree(self):
+	def boruvka_solve(self, workers: int = None):
 		"""
-		Draws the before and after result of applying the minimum spanning tree algorithm
+		Obtain a minimum spanning tree from the graph using a parallel Borůvka's Algorithm
+
+		The cheapest outgoing edge of every component is found over shards of the edges by a pool of workers
+		processes, see boruvka.py. If the graph is disconnected a minimum spanning forest is returned.
 		"""
-		self.graph.draw()
+		from boruvka import boruvka, edge_arrays
+
+		edge_ids = boruvka(*edge_arrays(self.graph), workers=workers).tolist()
+		edges = self.graph.edges
+		tree_edges = [edges[i] for i in edge_ids] if isinstance(edges, list) else edges[edge_ids]
 
+		return Graph(self.graph.vertices, tree_edges)
+
+	def draw_min_span_tree(self, path: str = None, max_nodes: int = MAX_DRAWN_VERTICES):
+		"""
+		Draws the before and after result of applying the minimum spanning tree algorithm side by side
+
+		Both graphs are drawn with the same layout so they can be compared. With path the drawing is saved instead of shown.
+		"""
 		min_span_tree = self.kruskal_solve()
-		min_span_tree.draw()
+
+		figure = Figure(figsize=(20, 10)) if path is not None else plt.figure(figsize=(20, 10))
+		before, after = figure.subplots(1, 2)
+		pos = self.graph.draw(ax=before, max_nodes=max_nodes)
+		min_span_tree.draw(ax=after, pos=pos)
+
+		if path is not None:
+			figure.savefig(path)
+		else:
+			plt.show()
 
 
 class Test_Minimum_Spanning_Tree(unittest.TestCase):
@@ -167,6 +692,59 @@ class Test_Minimum_Spanning_Tree(unittest.TestCase):
 	def test_graph_connected(self):
 		self.assertTrue(self.test_graph_1.is_connected("Minneapolis", "Milwaukee"))
 
+	def test_neighbour_index(self):
+		graph = self.test_graph_1.duplicate()
+		edge = ["Minneapolis", "Detroit", 600]
+		graph.edges.append(edge)
+		self.assertIn(edge, graph.get_neighbour_edges("Detroit"))
+		self.assertCountEqual(graph.get_neighbour_vertices("Minneapolis"), ["Chicago", "Nashville", "Detroit"])
+
+		graph.edges.remove(["Chicago", "Louisville", 269])
+		self.assertNotIn("Louisville", graph.get_neighbour_vertices("Chicago"))
+		self.assertEqual(graph.get_neighbour_edges("Chicago"), [edge for edge in graph.edges if "Chicago" in edge[:2]])
+
+	def test_track_components(self):
+		graph = Graph(["A", "B", "C", "D"], [])
+		graph.track_components()
+		self.assertEqual(graph.component_count(), 4)
+
+		graph.edges.append(["A", "B", 1])
+		graph.edges.append(["C", "D", 1])
+		self.assertFalse(graph.is_connected("A", "D"))
+		self.assertEqual(graph.component_count(), 2)
+
+		graph.edges.append(["B", "C", 1])
+		self.assertTrue(graph.is_connected("A", "D"))
+		graph.vertices.append("E")
+		self.assertEqual(graph.component_count(), 2)
+
+		graph.edges.remove(["B", "C", 1])
+		self.assertNotEqual(graph.component("A"), graph.component("D"))
+		self.assertEqual(graph.component_count(), 3)
+
+	def test_euler_path(self):
+		self.assertTrue(self.test_graph_1.has_euler_circuit())
+
+		# A house with a diagonal, only A and D have an odd degree
+		house = Graph(["A", "B", "C", "D", "E"], [["A", "B", 1], ["B", "C", 1], ["C", "D", 1], ["D", "A", 1], ["C", "E", 1], ["D", "E", 1], ["A", "C", 1]])
+		self.assertTrue(house.has_euler_path())
+		self.assertFalse(house.has_euler_circuit())
+
+		path = house.get_euler_path("A")
+		self.assertEqual(len(path), len(house.edges))
+		self.assertEqual(path[0][0], "A")
+		self.assertEqual(path[-1][1], "D")
+		for edge, next_edge in zip(path, path[1:]):
+			self.assertEqual(edge[1], next_edge[0])
+		self.assertCountEqual([sorted(edge[:2]) for edge in path], [sorted(edge[:2]) for edge in house.edges])
+
+		house.edges.remove(["D", "A", 1])
+		self.assertTrue(house.has_euler_circuit())
+		circuit = list(house.iter_euler_path("E"))
+		self.assertEqual(circuit[0][0], circuit[-1][1])
+		with self.assertRaises(GraphError):
+			house.get_euler_path("Z")
+
 	def test_kruskal_solve(self):
 		result_1 = self.test_min_spanning_tree_1.kruskal_solve()
 
@@ -178,6 +756,13 @@ class Test_Minimum_Spanning_Tree(unittest.TestCase):
 		for end in result_1.vertices[1:]:
 			self.assertTrue(result_1.is_connected(start, end))
 
+	def test_kruskal_solve_forest(self):
+		graph = Graph(["A", "B", "C", "D", "E"], [["A", "B", 3], ["B", "C", 1], ["A", "C", 2], ["D", "E", 4]])
+		result = Minimum_Spanning_Tree(graph).kruskal_solve()
+
+		self.assertCountEqual(result.edges, [["B", "C", 1], ["A", "C", 2], ["D", "E", 4]])
+		self.assertFalse(result.is_connected("A", "D"))
+
 	def test_prim_solve(self):
 		result_1 = self.test_min_spanning_tree_1.prim_solve()
 
@@ -189,6 +774,19 @@ class Test_Minimum_Spanning_Tree(unittest.TestCase):
 		for end in result_1.vertices[1:]:
 			self.assertTrue(result_1.is_connected(start, end))
 
+	def test_prim_solve_indexed_heap(self):
+		result_lazy = self.test_min_spanning_tree_1.prim_solve()
+		result_indexed = self.test_min_spanning_tree_1.prim_solve(indexed_heap=True)
+
+		self.assertEqual(result_lazy.vertices, result_indexed.vertices)
+		self.assertEqual(result_lazy.edges, result_indexed.edges)
+
+	def test_boruvka_solve(self):
+		result_kruskal = self.test_min_spanning_tree_1.kruskal_solve()
+		for workers in (1, 2):
+			result_boruvka = self.test_min_spanning_tree_1.boruvka_solve(workers)
+			self.assertCountEqual(result_kruskal.edges, result_boruvka.edges)
+
 	def test_kruskal_prim_solve(self):
 		result_1_kruskal = self.test_min_spanning_tree_1.kruskal_solve()
 		result_1_prim = self.test_min_spanning_tree_1.prim_solve()
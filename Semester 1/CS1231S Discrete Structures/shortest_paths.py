@@ -0,0 +1,233 @@
+import heapq
+import unittest
+from collections import OrderedDict, deque
+from typing import Union
+
+from graphs import Graph, GraphError
+
+
+class Shortest_Path:
+	"""
+	Shortest path queries on a Graph (or CSRGraph)
+
+	Complete single source distance trees are kept in an LRU cache of cache_size sources, which is cleared as soon as
+	the edges of the graph change. With cache_size=0 every query runs its own Dijkstra and stops at the target.
+	"""
+	def __init__(self, graph, cache_size: int = 128):
+		self.graph = graph
+		self.cache_size = cache_size
+		self._cache = OrderedDict()
+		self._cache_version = graph.version
+
+	def dijkstra(self, source: Union[str, int], targets: list = None) -> tuple:
+		"""
+		Runs Dijkstra's algorithm from source, stopping once every vertex in targets is settled
+
+		:return: (distances, previous) dictionaries of the settled vertices
+		"""
+		self._check_vertex(source)
+		remaining = None if targets is None else set(targets)
+
+		distances = {}
+		tentative = {source: 0}
+		previous = {source: None}
+		# The counter breaks ties so that vertex labels are never compared
+		heap = [(0, 0, source)]
+		counter = 1
+
+		while heap:
+			distance, _, cur = heapq.heappop(heap)
+			if cur in distances:
+				continue
+			distances[cur] = distance
+
+			if remaining is not None:
+				remaining.discard(cur)
+				if not remaining:
+					break
+
+			for edge in self.graph.get_neighbour_edges(cur):
+				if edge[2] < 0:
+					raise GraphError("Dijkstra's algorithm does not support negative weights")
+
+				neighbour = edge[0] if edge[1] == cur else edge[1]
+				new_distance = distance + edge[2]
+				if neighbour not in distances and (neighbour not in tentative or new_distance < tentative[neighbour]):
+					tentative[neighbour] = new_distance
+					previous[neighbour] = cur
+					heapq.heappush(heap, (new_distance, counter, neighbour))
+					counter += 1
+
+		return distances, {vertex: previous[vertex] for vertex in distances}
+
+	def bfs(self, source: Union[str, int]) -> dict:
+		"""
+		Returns the number of edges on the shortest path from source to every reachable vertex
+		"""
+		self._check_vertex(source)
+		distances = {source: 0}
+		queue = deque([source])
+
+		while queue:
+			cur = queue.popleft()
+			for neighbour in self.graph.get_neighbour_vertices(cur):
+				if neighbour not in distances:
+					distances[neighbour] = distances[cur] + 1
+					queue.append(neighbour)
+
+		return distances
+
+	def dfs(self, source: Union[str, int]) -> list:
+		"""
+		Returns the vertices reachable from source in depth first order, without recursion
+		"""
+		self._check_vertex(source)
+		visited = set()
+		order = []
+		stack = [source]
+
+		while stack:
+			cur = stack.pop()
+			if cur in visited:
+				continue
+			visited.add(cur)
+			order.append(cur)
+			# Reversed so that neighbours are visited in the same order as the recursive version
+			stack.extend(neighbour for neighbour in reversed(self.graph.get_neighbour_vertices(cur)) if neighbour not in visited)
+
+		return order
+
+	def distance_tree(self, source: Union[str, int]) -> tuple:
+		"""
+		Returns the (distances, previous) tree of every vertex reachable from source, using the cache
+		"""
+		if self._cache_version != self.graph.version:
+			self._cache.clear()
+			self._cache_version = self.graph.version
+
+		if source in self._cache:
+			self._cache.move_to_end(source)
+			return self._cache[source]
+
+		tree = self.dijkstra(source)
+		if self.cache_size > 0:
+			self._cache[source] = tree
+			if len(self._cache) > self.cache_size:
+				self._cache.popitem(last=False)
+		return tree
+
+	def distance(self, source: Union[str, int], target: Union[str, int]) -> float:
+		"""
+		Returns the length of the shortest path from source to target, or infinity if there is none
+		"""
+		return self.batch_distances([(source, target)])[0]
+
+	def path(self, source: Union[str, int], target: Union[str, int]) -> list:
+		"""
+		Returns the vertices on the shortest path from source to target
+		"""
+		return self.batch_paths([(source, target)])[0]
+
+	def batch_distances(self, pairs: list) -> list:
+		"""
+		Returns the shortest path length of every (source, target) pair, infinity where target is unreachable
+		"""
+		return [distances.get(target, float("inf")) for (distances, previous), (source, target) in zip(self._solve(pairs), pairs)]
+
+	def batch_paths(self, pairs: list) -> list:
+		"""
+		Returns the shortest path of every (source, target) pair, None where target is unreachable
+		"""
+		paths = []
+		for (distances, previous), (source, target) in zip(self._solve(pairs), pairs):
+			if target not in distances:
+				paths.append(None)
+				continue
+
+			path = [target]
+			while path[-1] != source:
+				path.append(previous[path[-1]])
+			paths.append(path[::-1])
+
+		return paths
+
+	def _solve(self, pairs: list) -> list:
+		"""
+		Returns the distance tree that answers each pair, searching once per distinct source
+		"""
+		targets = {}
+		for source, target in pairs:
+			targets.setdefault(source, set()).add(target)
+
+		trees = {}
+		for source, source_targets in targets.items():
+			if self.cache_size > 0:
+				trees[source] = self.distance_tree(source)
+			else:
+				trees[source] = self.dijkstra(source, source_targets)
+
+			for target in source_targets - trees[source][0].keys():
+				self._check_vertex(target)
+
+		return [trees[source] for source, target in pairs]
+
+	def _check_vertex(self, vertex: Union[str, int]):
+		if hasattr(self.graph, "vertex_id"):
+			# Raises GraphError for unknown labels, from a label -> id dict
+			self.graph.vertex_id(vertex)
+		elif vertex not in self.graph._adjacency and vertex not in self.graph.vertices:
+			# Only isolated or unknown vertices are missing from the adjacency index
+			raise GraphError("Vertex {} not found in graph".format(vertex))
+
+
+class Test_Shortest_Path(unittest.TestCase):
+	def setUp(self):
+		vertices = ["Minneapolis", "Milwaukee", "Chicago", "St. Louis", "Detroit", "Cincinnati", "Louisville", "Nashville", "Honolulu"]
+		edges = [
+			["Minneapolis", "Chicago", 355],
+			["Minneapolis", "Nashville", 695],
+			["Milwaukee", "Chicago", 74],
+			["Milwaukee", "Louisville", 348],
+			["Chicago", "Louisville", 269],
+			["Chicago", "St. Louis", 262],
+			["St. Louis", "Louisville", 242],
+			["Nashville", "Louisville", 151],
+			["Louisville", "Cincinnati", 83],
+			["Louisville", "Detroit", 306],
+			["Cincinnati", "Detroit", 230]
+		]
+		self.graph = Graph(vertices, edges)
+		self.shortest_path = Shortest_Path(self.graph)
+
+	def test_dijkstra(self):
+		import networkx as nx
+		expected = nx.single_source_dijkstra_path_length(self.graph.parse_graph(), "Minneapolis")
+		self.assertEqual(self.shortest_path.distance_tree("Minneapolis")[0], expected)
+		self.assertEqual(self.shortest_path.path("Minneapolis", "Detroit"), ["Minneapolis", "Chicago", "Louisville", "Detroit"])
+		self.assertEqual(self.shortest_path.distance("Minneapolis", "Honolulu"), float("inf"))
+		self.assertIsNone(self.shortest_path.path("Minneapolis", "Honolulu"))
+
+	def test_batch(self):
+		pairs = [("Minneapolis", "Detroit"), ("Milwaukee", "Nashville"), ("Minneapolis", "Cincinnati")]
+		uncached = Shortest_Path(self.graph, cache_size=0)
+		self.assertEqual(uncached.batch_distances(pairs), [930, 494, 707])
+		self.assertEqual(self.shortest_path.batch_distances(pairs), [930, 494, 707])
+		self.assertEqual(uncached.batch_paths(pairs), self.shortest_path.batch_paths(pairs))
+
+	def test_cache_invalidation(self):
+		self.assertEqual(self.shortest_path.distance("Minneapolis", "Detroit"), 930)
+		self.graph.edges.append(["Minneapolis", "Detroit", 500])
+		self.assertEqual(self.shortest_path.distance("Minneapolis", "Detroit"), 500)
+		self.graph.edges.remove(["Minneapolis", "Detroit", 500])
+		self.assertEqual(self.shortest_path.distance("Minneapolis", "Detroit"), 930)
+
+	def test_bfs_dfs(self):
+		self.assertEqual(self.shortest_path.bfs("Minneapolis")["Detroit"], 3)
+		self.assertNotIn("Honolulu", self.shortest_path.bfs("Minneapolis"))
+		self.assertEqual(self.shortest_path.dfs("Minneapolis"), ["Minneapolis", "Chicago", "Milwaukee", "Louisville", "St. Louis", "Nashville", "Cincinnati", "Detroit"])
+		with self.assertRaises(GraphError):
+			self.shortest_path.bfs("Atlantis")
+
+
+if __name__ == '__main__':
+	unittest.main(verbosity=2)
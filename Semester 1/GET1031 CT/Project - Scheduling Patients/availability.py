@@ -0,0 +1,119 @@
+import unittest
+
+import numpy as np
+
+
+class Availability:
+	"""
+	Doctors x timeslots boolean matrix of which doctor is free in which slot, with a mask of the specialist doctors
+
+	Doctors and timeslots are addressed by their index in self.doctors and self.timeslots, self.index and
+	self.position map labels to those. The matrix is stored column major so the doctors free in one slot are contiguous.
+	"""
+	def __init__(self, doctors: dict, timeslots: list, specialists: tuple = ()):
+		"""
+		:param doctors: {doctor: [available timeslots]}, timeslots that are not in timeslots are ignored
+		:param timeslots: the timeslots in order
+		:param specialists: the doctors who can see specialist patients
+		"""
+		self.doctors = list(doctors)
+		self.index = {doctor: i for i, doctor in enumerate(self.doctors)}
+		self.timeslots = list(timeslots)
+		self.position = {timeslot: i for i, timeslot in enumerate(self.timeslots)}
+
+		self.matrix = np.zeros((len(self.doctors), len(self.timeslots)), dtype=bool, order="F")
+		for i, doctor in enumerate(self.doctors):
+			self.matrix[i, [self.position[timeslot] for timeslot in doctors[doctor] if timeslot in self.position]] = True
+
+		specialists = set(specialists)
+		self.specialist = np.array([doctor in specialists for doctor in self.doctors], dtype=bool)
+
+	def free(self, position: int, specialist: bool = False) -> np.ndarray:
+		"""
+		Returns the indices of the doctors free in the slot at position, in doctor order, optionally only specialists
+		"""
+		column = self.matrix[:, position]
+		return np.flatnonzero(column & self.specialist if specialist else column)
+
+	def free_counts(self) -> np.ndarray:
+		"""
+		Returns the number of free doctors in every slot
+		"""
+		return self.matrix.sum(axis=0)
+
+	def is_free(self, doctor: int, position: int) -> bool:
+		return bool(self.matrix[doctor, position])
+
+	def book(self, doctor: int, position: int):
+		"""
+		Marks a doctor as busy in a slot
+		"""
+		if not self.matrix[doctor, position]:
+			raise ValueError("{} is not free at {}".format(self.doctors[doctor], self.timeslots[position]))
+		self.matrix[doctor, position] = False
+
+	def set(self, doctor: int, position: int, available: bool = True):
+		self.matrix[doctor, position] = available
+
+	def add_doctor(self, doctor, specialist: bool = False) -> int:
+		"""
+		Adds a doctor who is not free in any slot yet and returns their index
+		"""
+		self.index[doctor] = len(self.doctors)
+		self.doctors.append(doctor)
+		self.matrix = np.asfortranarray(np.vstack([self.matrix, np.zeros((1, len(self.timeslots)), dtype=bool)]))
+		self.specialist = np.append(self.specialist, specialist)
+		return self.index[doctor]
+
+	def to_dict(self) -> dict:
+		"""
+		Returns the availability in the {doctor: [available timeslots]} form
+		"""
+		timeslots = np.array(self.timeslots)
+		return {doctor: timeslots[self.matrix[i]].tolist() for i, doctor in enumerate(self.doctors)}
+
+	@property
+	def nbytes(self) -> int:
+		return self.matrix.nbytes + self.specialist.nbytes
+
+
+class Test_Availability(unittest.TestCase):
+	def setUp(self):
+		self.doctors = {1: [1200, 1215], 2: [1215, 1230], 3: [1200, 1230, 1300]}
+		self.availability = Availability(self.doctors, [1200, 1215, 1230], specialists=(2, 3))
+
+	def test_free(self):
+		self.assertEqual(self.availability.free(0).tolist(), [0, 2])
+		self.assertEqual(self.availability.free(0, specialist=True).tolist(), [2])
+		self.assertEqual(self.availability.free(1).tolist(), [0, 1])
+		self.assertEqual(self.availability.free(1, specialist=True).tolist(), [1])
+		self.assertEqual(self.availability.free_counts().tolist(), [2, 2, 2])
+
+	def test_book(self):
+		self.availability.book(0, 0)
+		self.assertFalse(self.availability.is_free(0, 0))
+		self.assertEqual(self.availability.free(0).tolist(), [2])
+		with self.assertRaises(ValueError):
+			self.availability.book(0, 0)
+		with self.assertRaises(ValueError):
+			self.availability.book(1, 0)
+
+	def test_set_and_add_doctor(self):
+		self.availability.set(0, 2)
+		self.availability.set(2, 0, False)
+		doctor = self.availability.add_doctor(4, specialist=True)
+		self.assertEqual(doctor, 3)
+		self.assertEqual(self.availability.index[4], 3)
+		self.assertEqual(self.availability.free(1).tolist(), [0, 1])
+		self.availability.set(doctor, 1)
+		self.assertEqual(self.availability.free(1, specialist=True).tolist(), [1, 3])
+		self.assertTrue(self.availability.matrix.flags.f_contiguous)
+		self.assertEqual(self.availability.to_dict(), {1: [1200, 1215, 1230], 2: [1215, 1230], 3: [1230], 4: [1215]})
+
+	def test_to_dict(self):
+		# 1300 is not one of the timeslots, so it is dropped
+		expected = {1: [1200, 1215], 2: [1215, 1230], 3: [1200, 1230]}
+		self.assertEqual(self.availability.to_dict(), expected)
+		copy = Availability(self.availability.to_dict(), self.availability.timeslots, (2, 3))
+		np.testing.assert_array_equal(copy.matrix, self.availability.matrix)
+		np.testing.assert_array_equal(copy.specialist, self.availability.specialist)
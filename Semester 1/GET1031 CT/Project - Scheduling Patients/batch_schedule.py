@@ -0,0 +1,181 @@
+"""
+Schedules many clinics over many days, one clinic per worker process
+
+Every line of the input file is one (clinic, day) problem:
+
+	{"clinic": "east", "day": "2024-03-04", "patients": {"A": [2, true, 1200]}, "doctors": {"2": [1200, 1215]}, "specialists": ["2"]}
+
+"timeslots" and "specialists" default to the ones in schedule.py. Doctors are JSON object keys, so they are strings. The days of a clinic are scheduled in order of "day",
+and patients still waiting at the end of a day join the start of the clinic's next day with the priority they reached,
+named "day:name" from then on. Every output line holds the assignments and the patients still waiting after one
+(clinic, day), or the error that stopped it, written as soon as the clinic is done.
+
+	python batch_schedule.py problems.jsonl results.jsonl --workers 8
+"""
+import argparse
+import json
+import re
+import unittest
+from multiprocessing import Pool
+
+from schedule import Scheduler, timeslots, specialists
+
+
+def schedule_clinic(lines: list, clinic=None) -> list:
+	"""
+	Schedules the days of one clinic in order, carrying the unscheduled patients over to the next day
+
+	Patients are told apart by the day they arrived on. Carried patients are named "day:name" in the results of the
+	later days, so they never clash with the next day's own patients. A line or day that cannot be scheduled gives an
+	error result instead and its carried patients move on to the day after.
+
+	:param lines: the JSON input lines of the clinic
+	:param clinic: the clinic the lines were grouped under, used for the error results
+	:return: returns one result dictionary per day
+	"""
+	results = []
+	days = []
+	for line in lines:
+		try:
+			problem = json.loads(line)
+			problem["clinic"]
+		except (ValueError, KeyError, TypeError) as e:
+			results.append({"clinic": clinic, "day": None, "error": "Invalid problem: {!r}".format(e), "line": line.strip()})
+			continue
+		days.append(problem)
+
+	days.sort(key=lambda problem: str(problem.get("day", "")))
+	carried = {}
+
+	for index, problem in enumerate(days):
+		day = problem.get("day", index)
+		label = lambda patient: patient[1] if patient[0] == day else "{}:{}".format(*patient)
+		try:
+			day_timeslots = problem.get("timeslots", timeslots)
+			scheduler = Scheduler(problem["doctors"], day_timeslots, problem.get("specialists", [str(doctor) for doctor in specialists]))
+
+			# Patients carried over are added first so they win ties with the day's own patients
+			for patient, (priority, specialist, timeslot) in carried.items():
+				scheduler.add_patient(patient, priority, specialist, day_timeslots[0])
+			for name, (priority, specialist, timeslot) in problem["patients"].items():
+				scheduler.add_patient((day, name), priority, specialist, timeslot)
+
+			assignments = scheduler.run()
+		except Exception as e:
+			# A bad problem only costs its own day, never the clinic or the batch
+			results.append({"clinic": problem["clinic"], "day": problem.get("day"), "error": "{}: {}".format(type(e).__name__, e)})
+			continue
+
+		carried = scheduler.unscheduled()
+		results.append({
+			"clinic": problem["clinic"],
+			"day": problem.get("day"),
+			"assignments": {label(patient): assignment for patient, assignment in assignments.items()},
+			"unscheduled": {label(patient): waiting for patient, waiting in carried.items()},
+		})
+
+	return results
+
+
+# Finds the clinic of a line without parsing all of it, only used when "clinic" occurs once in the line
+CLINIC = re.compile(r'"clinic"\s*:\s*("(?:[^"\\]|\\.)*")')
+
+
+def clinic_key(line: str):
+	"""
+	Returns the clinic of an input line, or None if the line has none or is not valid JSON
+	"""
+	if line.count('"clinic"') == 1:
+		match = CLINIC.search(line)
+		if match:
+			return json.loads(match.group(1))
+	try:
+		return json.loads(line)["clinic"]
+	except (ValueError, KeyError, TypeError):
+		return None
+
+
+def read_clinics(path: str) -> dict:
+	"""
+	Groups the lines of the input file by clinic, the lines are only parsed in full in the workers. Lines without a
+	clinic are grouped under None, and reported as errors by the worker.
+	"""
+	clinics = {}
+	with open(path) as f:
+		for line in f:
+			if line.strip():
+				clinics.setdefault(clinic_key(line), []).append(line)
+	return clinics
+
+
+def _schedule_shard(shard: tuple) -> list:
+	clinic, lines = shard
+	return schedule_clinic(lines, clinic)
+
+
+def run(input_path: str, output_path: str, workers: int = None) -> int:
+	"""
+	Schedules every clinic in the input file across a pool of worker processes, streaming results to the output file
+
+	:return: returns the number of (clinic, day) results written, including errors
+	"""
+	clinics = read_clinics(input_path)
+	# The clinics with the most days go first so a long clinic does not start last
+	shards = sorted(clinics.items(), key=lambda shard: len(shard[1]), reverse=True)
+	written = 0
+
+	with Pool(workers) as pool, open(output_path, "w") as output:
+		for results in pool.imap_unordered(_schedule_shard, shards):
+			for result in results:
+				output.write(json.dumps(result) + "\n")
+			output.flush()
+			written += len(results)
+
+	return written
+
+
+class Test_Batch_Schedule(unittest.TestCase):
+	def problem(self, day: str, patients: dict, doctors: dict) -> str:
+		return json.dumps({"clinic": "east", "day": day, "patients": patients, "doctors": doctors, "timeslots": [1200, 1215], "specialists": []})
+
+	def test_carried_patients(self):
+		lines = [
+			self.problem("2", {"A": [1, False, 1200]}, {"1": [1200, 1215]}),
+			self.problem("1", {"A": [2, False, 1200], "B": [1, False, 1200], "C": [1, False, 1215]}, {"1": [1200]}),
+		]
+		first, second = schedule_clinic(lines)
+		self.assertEqual(first["assignments"], {"A": [1200, "1"]})
+		self.assertEqual(first["unscheduled"], {"B": [3, False, None], "C": [2, False, None]})
+		# Yesterday's A and B keep apart from today's A and go first, with the priority they reached
+		self.assertEqual(second["assignments"], {"1:B": [1200, "1"], "1:C": [1215, "1"]})
+		self.assertEqual(second["unscheduled"], {"A": [3, False, None]})
+
+	def test_errors(self):
+		lines = [
+			self.problem("1", {"A": [1, False, 1200]}, {"1": []}),
+			'{"clinic": "east", "day": "2", "patients": ',
+			self.problem("3", {"B": [1, False, 1300]}, {"1": [1200]}),
+			self.problem("4", {}, {"1": [1200]}),
+		]
+		self.assertEqual([clinic_key(line) for line in lines], ["east"] * 4)
+		self.assertEqual(clinic_key('{"day": "1", "patients": {"clinic": [1, false, 1200]}}'), None)
+		results = schedule_clinic(lines, "east")
+		self.assertEqual([result.get("day") for result in results], [None, "1", "3", "4"])
+		self.assertTrue(results[0]["error"].startswith("Invalid problem"))
+		self.assertIn("1300 is not a timeslot", results[2]["error"])
+		# A is carried past the failed day
+		self.assertEqual(results[3]["assignments"], {"1:A": [1200, "1"]})
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Schedule many (clinic, day) problems across worker processes")
+	parser.add_argument("input", help="JSONL file of (clinic, day) problems")
+	parser.add_argument("output", help="JSONL file to write the results to")
+	parser.add_argument("--workers", type=int, default=None, help="number of worker processes, defaults to the CPU count")
+	args = parser.parse_args()
+
+	print("Wrote {} clinic day results".format(run(args.input, args.output, args.workers)))
+
+
+if __name__ == '__main__':
+	main()
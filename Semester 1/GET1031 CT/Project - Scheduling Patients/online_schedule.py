@@ -0,0 +1,215 @@
+"""
+Online scheduling: patients and doctor availability arrive as a stream of JSON events while the day goes on
+
+	{"type": "patient", "name": "A", "priority": 2, "specialist": true, "timeslot": 1200}
+	{"type": "availability", "doctor": 3, "timeslot": 1400, "available": false}
+	{"type": "close"}                      closes the current slot
+	{"type": "close", "timeslot": 1300}    closes every slot up to and including 1300
+
+Assignments are emitted as soon as their slot closes, and the slots still open are closed when the stream ends.
+Lines that are not valid JSON and events with missing or badly typed fields are emitted as error records and skipped.
+Events are read from JSONL files, or from asyncio StreamReaders (sockets, pipes) when serve is called directly.
+
+	python online_schedule.py clinic_a.jsonl clinic_b.jsonl
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+from schedule import Scheduler, doctors, timeslots, specialists
+
+# Marks the end of an event stream
+END = None
+
+
+class OnlineClinic:
+	"""
+	Feeds the events of one clinic into a Scheduler, every event costs O(log n) apart from closing a slot
+	"""
+	def __init__(self, name: str, doctors: dict, timeslots: list, specialists: tuple = specialists):
+		self.name = name
+		self.scheduler = Scheduler(doctors, timeslots, specialists)
+
+	def handle(self, event: dict) -> list:
+		"""
+		Applies one event and returns the records to emit, assignments or an error
+		"""
+		try:
+			if event["type"] == "invalid":
+				return [{"clinic": self.name, "error": event["error"], "line": event["line"]}]
+			if event["type"] == "patient":
+				self.scheduler.add_patient(event["name"], event["priority"], event.get("specialist", False), event["timeslot"])
+				return []
+			if event["type"] == "availability":
+				self.scheduler.set_available(event["doctor"], event["timeslot"], event.get("available", True))
+				return []
+			if event["type"] == "close":
+				last = self.scheduler.position[event["timeslot"]] if "timeslot" in event else self.scheduler.current
+				return self.close(last)
+			raise ValueError("Unknown event type {}".format(event["type"]))
+		except (KeyError, ValueError, TypeError) as e:
+			return [{"clinic": self.name, "error": str(e), "event": event}]
+
+	def close(self, last: int = None) -> list:
+		"""
+		Closes every slot up to position last, or all of them
+		"""
+		last = len(self.scheduler.timeslots) - 1 if last is None else last
+		records = []
+		while self.scheduler.current <= last and self.scheduler.current < len(self.scheduler.timeslots):
+			for name, timeslot, doctor in self.scheduler.close_slot():
+				records.append({"clinic": self.name, "name": name, "timeslot": timeslot, "doctor": doctor})
+		return records
+
+
+async def run_clinic(clinic: OnlineClinic, events: asyncio.Queue, output: asyncio.Queue):
+	"""
+	Consumes events until END, putting every record to emit on output as soon as it is known
+	"""
+	while True:
+		event = await events.get()
+		records = clinic.close() if event is END else clinic.handle(event)
+		for record in records:
+			await output.put(record)
+		if event is END:
+			return
+
+
+def decode(line) -> dict:
+	"""
+	Returns the event on a JSON line, or an "invalid" event which the clinic reports as an error
+	"""
+	try:
+		return json.loads(line)
+	except ValueError as e:
+		# JSONDecodeError, or UnicodeDecodeError for bytes from a stream
+		line = line.decode(errors="replace") if isinstance(line, bytes) else line
+		return {"type": "invalid", "error": "Invalid JSON: {}".format(e), "line": line.strip()}
+
+
+async def read_stream(reader: asyncio.StreamReader, events: asyncio.Queue):
+	"""
+	Puts every JSON line read from a stream (a socket, pipe, ...) on events, then END
+	"""
+	while True:
+		line = await reader.readline()
+		if not line:
+			break
+		if line.strip():
+			await events.put(decode(line))
+	await events.put(END)
+
+
+async def read_jsonl(path: str, events: asyncio.Queue):
+	"""
+	Puts every JSON line of a file on events, then END. The file is read in a thread so the event loop never blocks
+	"""
+	with open(path) as f:
+		while True:
+			line = await asyncio.to_thread(f.readline)
+			if not line:
+				break
+			if line.strip():
+				await events.put(decode(line))
+	await events.put(END)
+
+
+async def serve(sources: dict, doctors: dict, timeslots: list, specialists: tuple = specialists, emit=print, queue_size: int = 1024):
+	"""
+	Runs one clinic per event source concurrently, calling emit with every record as it is produced
+
+	:param sources: {clinic name: path of its JSONL event file, or an asyncio.StreamReader such as a socket or pipe}
+	"""
+	output = asyncio.Queue()
+	tasks = []
+	for name, source in sources.items():
+		events = asyncio.Queue(queue_size)
+		reader = read_stream(source, events) if isinstance(source, asyncio.StreamReader) else read_jsonl(source, events)
+		tasks.append(asyncio.create_task(reader))
+		tasks.append(asyncio.create_task(run_clinic(OnlineClinic(name, doctors, timeslots, specialists), events, output)))
+
+	async def drain():
+		while True:
+			record = await output.get()
+			if record is END:
+				return
+			emit(record)
+
+	printer = asyncio.create_task(drain())
+	await asyncio.gather(*tasks)
+	await output.put(END)
+	await printer
+
+
+def main():
+	sources = {path: path for path in sys.argv[1:]}
+	asyncio.run(serve(sources, doctors, timeslots, emit=lambda record: print(json.dumps(record), flush=True)))
+
+
+class Test_OnlineClinic(unittest.TestCase):
+	def serve(self, lines: list) -> list:
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, "clinic.jsonl")
+			with open(path, "w") as f:
+				f.write("\n".join(lines) + "\n")
+			records = []
+			asyncio.run(serve({"clinic": path}, {1: [1200, 1215]}, [1200, 1215], (), emit=records.append))
+		return records
+
+	def test_stream(self):
+		asyncio.run(self.stream())
+
+	async def stream(self):
+		reader = asyncio.StreamReader()
+		records = []
+		server = asyncio.create_task(serve({"clinic": reader}, {1: [1200]}, [1200, 1215, 1230], (), emit=records.append))
+
+		async def send(*events):
+			for event in events:
+				reader.feed_data((json.dumps(event) + "\n").encode())
+			# Let the reader and the clinic catch up, the stream stays open
+			for _ in range(20):
+				await asyncio.sleep(0)
+
+		await send({"type": "patient", "name": "A", "priority": 1, "timeslot": 1200}, {"type": "close"})
+		self.assertEqual(records, [{"clinic": "clinic", "name": "A", "timeslot": 1200, "doctor": 1}])
+
+		# Doctor 2 joins at 1215 and leaves again before 1230, so C is not seen
+		await send(
+			{"type": "availability", "doctor": 2, "timeslot": 1215},
+			{"type": "availability", "doctor": 2, "timeslot": 1230},
+			{"type": "patient", "name": "B", "priority": 1, "timeslot": 1215},
+			{"type": "close", "timeslot": 1215},
+		)
+		self.assertEqual(records[1:], [{"clinic": "clinic", "name": "B", "timeslot": 1215, "doctor": 2}])
+
+		await send({"type": "availability", "doctor": 2, "timeslot": 1230, "available": False}, {"type": "patient", "name": "C", "priority": 1, "timeslot": 1230})
+		reader.feed_eof()
+		await asyncio.wait_for(server, 5)
+		self.assertEqual(len(records), 2)
+
+	def test_bad_events(self):
+		records = self.serve([
+			'{"type": "patient", "name": "A", "priority": 1, "timeslot": 1200}',
+			'{"type": "patient", "name": "B", "priority": ',
+			'{"type": "patient", "name": "C", "priority": "3", "timeslot": 1215}',
+			'["close"]',
+			'{"type": "patient", "name": "D", "priority": 2, "timeslot": 1215}',
+		])
+		errors = [record for record in records if "error" in record]
+		self.assertEqual(len(errors), 3)
+		self.assertTrue(errors[0]["error"].startswith("Invalid JSON"))
+		self.assertEqual(errors[0]["line"], '{"type": "patient", "name": "B", "priority":')
+		self.assertEqual(errors[1]["event"]["name"], "C")
+		self.assertEqual(errors[2]["event"], ["close"])
+
+		# The clinic carries on after the bad lines
+		assignments = [[record["name"], record["timeslot"]] for record in records if "error" not in record]
+		self.assertEqual(assignments, [["A", 1200], ["D", 1215]])
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,188 @@
+import unittest
+
+import networkx as nx
+
+from availability import Availability
+from schedule import patients, doctors, timeslots, specialists, schedule
+
+
+def optimal_schedule(patients: dict, doctors: dict, timeslots: list, specialists: tuple = specialists, window: int = None) -> dict:
+	"""
+	Schedules a day by minimising the total weighted wait with a min cost flow, instead of greedily
+
+	A patient waiting w slots costs priority * w. Specialist patients can only see specialist doctors, everyone else
+	can see any doctor. With window=None the whole day is solved at once. Otherwise the next window slots are solved
+	together, only the assignments of the first slot are kept and the window moves on by one slot.
+
+	Doctors free in the same slot are interchangeable, and so are patients with the same arrival slot, priority and
+	kind, so the flow network has one node per group of patients and two per slot (specialist and other doctors).
+	Its size does not depend on how many patients or doctors there are in each group.
+
+	:param patients: {name: [priority, needs_specialist, timeslot]}
+	:param doctors: {doctor: [available timeslots]}
+	:param timeslots: the timeslots of the day in order
+	:return: returns {name: [timeslot, doctor]} of every patient seen
+	"""
+	availability = Availability(doctors, timeslots, specialists)
+	position = availability.position
+
+	# The (other, specialist) doctors free in every slot
+	free = []
+	for slot in range(len(timeslots)):
+		doctors_free = availability.free(slot)
+		is_specialist = availability.specialist[doctors_free]
+		free.append(tuple([availability.doctors[i] for i in doctors_free[is_specialist == kind]] for kind in (False, True)))
+
+	# Groups of interchangeable patients, each in the order they were given
+	groups = {}
+	for name, (priority, specialist, timeslot) in patients.items():
+		if timeslot not in position:
+			raise ValueError("{} is not a timeslot".format(timeslot))
+		groups.setdefault((position[timeslot], priority, bool(specialist)), []).append(name)
+
+	window = len(timeslots) if window is None else window
+	output = {}
+	start = 0
+	while start < len(timeslots):
+		end = min(start + window, len(timeslots))
+		flow = _solve_window(groups, free, start, end, len(timeslots))
+		last = end if end == len(timeslots) else start + 1
+
+		for (arrival, priority, specialist), names in sorted(groups.items(), key=lambda item: (-item[0][1], item[0][0])):
+			for slot in range(start, last):
+				for kind in (True, False):
+					count = flow.get((arrival, priority, specialist), {}).get(("slot", slot, kind), 0)
+					for name in names[:count]:
+						output[name] = [timeslots[slot], free[slot][kind].pop(0)]
+					del names[:count]
+
+		groups = {group: names for group, names in groups.items() if names}
+		start = last
+
+	return output
+
+
+def _solve_window(groups: dict, free: list, start: int, end: int, horizon: int) -> dict:
+	"""
+	Returns the min cost flow from the groups that have arrived by slot end - 1 to the doctors of the slots start..end-1,
+	horizon is the number of slots in the day
+	"""
+	# Leaving one patient for after the window costs more than all the waits of the window together, so the flow seats
+	# as many patients as it can before it shortens any waits, and drops the lowest priorities first
+	arrived = [(group[1], len(names)) for group, names in groups.items() if group[0] < end]
+	unseated = horizon * sum(priority * count for priority, count in arrived) + 1
+
+	network = nx.DiGraph()
+	supply = 0
+	for group, names in groups.items():
+		arrival, priority, specialist = group
+		if arrival >= end:
+			continue
+
+		network.add_node(group, demand=-len(names))
+		supply += len(names)
+		for slot in range(max(start, arrival), end):
+			for kind in (True, False) if not specialist else (True,):
+				if free[slot][kind]:
+					network.add_edge(group, ("slot", slot, kind), weight=priority * (slot - arrival))
+		network.add_edge(group, "later", weight=unseated + priority * (horizon + 1))
+
+	for slot in range(start, end):
+		for kind in (True, False):
+			if free[slot][kind]:
+				network.add_edge(("slot", slot, kind), "later", capacity=len(free[slot][kind]), weight=0)
+
+	if not supply:
+		return {}
+	network.add_node("later", demand=supply)
+	return nx.min_cost_flow(network)
+
+
+def wait_statistics(patients: dict, output: dict, timeslots: list) -> dict:
+	"""
+	Summarises how long the patients waited, in slots, for the output of either scheduler
+
+	mean_wait and max_wait are over the patients seen. Unscheduled patients count as waiting until the end of the day
+	in weighted_wait, so a schedule cannot look better by leaving patients out, and unscheduled_priority is the sum of
+	their priorities.
+	"""
+	position = {timeslot: i for i, timeslot in enumerate(timeslots)}
+	waits = [(position[output[name][0]] - position[timeslot], priority) for name, (priority, specialist, timeslot) in patients.items() if name in output]
+	left = [(len(timeslots) - position[timeslot], priority) for name, (priority, specialist, timeslot) in patients.items() if name not in output]
+
+	return {
+		"seen": len(waits),
+		"unscheduled": len(left),
+		"mean_wait": sum(wait for wait, priority in waits) / len(waits) if waits else 0,
+		"max_wait": max((wait for wait, priority in waits), default=0),
+		"weighted_wait": sum(wait * priority for wait, priority in waits + left),
+		"unscheduled_priority": sum(priority for wait, priority in left),
+	}
+
+
+def compare(patients: dict, doctors: dict, timeslots: list, specialists: tuple = specialists, window: int = None) -> dict:
+	"""
+	Returns the wait statistics of the greedy scheduler and of optimal_schedule on the same day
+	"""
+	return {
+		"greedy": wait_statistics(patients, schedule(patients, doctors, timeslots, specialists), timeslots),
+		"optimal": wait_statistics(patients, optimal_schedule(patients, doctors, timeslots, specialists, window), timeslots),
+	}
+
+
+class Test_Optimal_Schedule(unittest.TestCase):
+	def check_valid(self, patients: dict, doctors: dict, timeslots: list, specialists: tuple, output: dict):
+		booked = set()
+		for name, (timeslot, doctor) in output.items():
+			priority, specialist, arrival = patients[name]
+			self.assertIn(timeslot, doctors[doctor])
+			self.assertGreaterEqual(timeslots.index(timeslot), timeslots.index(arrival))
+			self.assertNotIn((doctor, timeslot), booked)
+			booked.add((doctor, timeslot))
+			if specialist:
+				self.assertIn(doctor, specialists)
+
+	def test_sample_day(self):
+		output = optimal_schedule(patients, doctors, timeslots)
+		self.check_valid(patients, doctors, timeslots, specialists, output)
+		statistics = compare(patients, doctors, timeslots)
+		self.assertEqual(statistics["optimal"]["unscheduled"], 0)
+		self.assertLessEqual(statistics["optimal"]["weighted_wait"], statistics["greedy"]["weighted_wait"])
+
+	def test_specialists(self):
+		# Only doctor 1, not a specialist, is free at 0, so S has to wait for doctor 2 and T is never seen
+		day = {"S": [3, True, 0], "G": [1, False, 0], "T": [1, True, 2]}
+		roster = {1: [0, 1, 2], 2: [1]}
+		output = optimal_schedule(day, roster, [0, 1, 2], (2,))
+		self.check_valid(day, roster, [0, 1, 2], (2,), output)
+		self.assertEqual(output, {"S": [1, 2], "G": [0, 1]})
+
+	def test_window(self):
+		for window in (1, 3, len(timeslots)):
+			output = optimal_schedule(patients, doctors, timeslots, window=window)
+			self.check_valid(patients, doctors, timeslots, specialists, output)
+			self.assertEqual(len(output), len(patients))
+		self.assertEqual(optimal_schedule(patients, doctors, timeslots, window=len(timeslots)), optimal_schedule(patients, doctors, timeslots))
+
+	def test_seats_as_many_as_greedy(self):
+		# Seating A at 0 and leaving B out used to cost as much as seating both, and the flow left B out
+		day = {"A": [2, False, 0], "B": [1, True, 0]}
+		roster = {0: [0], 1: [1]}
+		self.assertEqual(schedule(day, roster, [0, 1], (0,)), {"B": [0, 0], "A": [1, 1]})
+		self.assertEqual(optimal_schedule(day, roster, [0, 1], (0,)), {"B": [0, 0], "A": [1, 1]})
+
+	def test_wait_statistics(self):
+		day = {"A": [2, False, 0], "B": [1, False, 1], "C": [3, False, 1]}
+		statistics = wait_statistics(day, {"A": [2, 1], "B": [1, 1]}, [0, 1, 2])
+		# C is counted as waiting the 2 slots to the end of the day
+		self.assertEqual(statistics, {"seen": 2, "unscheduled": 1, "mean_wait": 1, "max_wait": 2, "weighted_wait": 4 + 6, "unscheduled_priority": 3})
+
+
+def main():
+	print(optimal_schedule(patients, doctors, timeslots))
+	for policy, statistics in compare(patients, doctors, timeslots).items():
+		print(policy, statistics)
+
+
+if __name__ == '__main__':
+	main()
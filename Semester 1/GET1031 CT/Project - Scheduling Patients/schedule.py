@@ -1,3 +1,10 @@
+import copy
+import heapq
+import numbers
+import unittest
+
+from availability import Availability
+
 patients = {
 	"A": [2, True, 1200],
 	"B": [2, False, 1215],
@@ -29,8 +36,6 @@ doctors = {
 	5: [1500, 1515, 1530, 1545, 1600, 1615, 1630, 1645]
 }
 
-output = {}
-
 timeslots = [
 	1200, 1215, 1230, 1245,
 	1300, 1315, 1330, 1345,
@@ -40,59 +45,176 @@ timeslots = [
 	1700
 ]
 
-for timeslot in timeslots:
-	possible_patients = sorted([p for p in patients if patients[p][2] == timeslot], key=lambda p: patients[p][0], reverse=True)
-	possible_doctors = [d for d in doctors if timeslot in doctors[d]]
-	specialised_p = [p for p in possible_patients if patients[p][1]]
-	specialised_d = [d for d in possible_doctors if d == 2 or d == 5]
+specialists = (2, 5)
 
-	print('=====================')
-	print(timeslot)
-	print(possible_patients, possible_doctors, specialised_p, specialised_d)
 
-	cur_patient = -1
-	while possible_doctors != [] and possible_patients != []:
-		if specialised_p != []:
-			cur_patient = specialised_p[0]
-		else:
-			cur_patient = possible_patients[0]
-
-		if specialised_p != []:
-			if specialised_d != []:
-				cur_doc = specialised_d[0]
-				output[cur_patient] = [timeslot, cur_doc]
-				possible_patients.remove(cur_patient)
-				specialised_p.remove(cur_patient)
-				doctors[cur_doc].remove(timeslot)
-				possible_doctors.remove(cur_doc)
-
-				for p in possible_patients:
-					patients[p][0] += 1
-					patients[p][2] = timeslots[timeslots.index(timeslot) + 1]
-				del patients[cur_patient]
-			else:
-				patients[cur_patient][0] += 1
-				patients[cur_patient][2] = timeslots[timeslots.index(timeslot) + 1]
-				possible_patients.remove(cur_patient)
-				specialised_p = []
+class Scheduler:
+	"""
+	Assigns patients to doctors one timeslot at a time
+
+	In every slot the waiting specialist patients are seen first, by specialist doctors only, then the other patients
+	by whichever doctors are left. Higher priority goes first, ties in the order the patients were added. A patient who
+	is not seen moves on to the next slot with their priority raised by one.
+
+	Waiting for one more slot raises every waiting patient's priority alike, so patients are kept in a heap keyed by
+	priority minus the position of the slot they arrived in and never have to be touched again when deferred. Patients
+	for later slots wait in per-slot buckets until their slot opens. Free doctors are looked up in an Availability matrix.
+	"""
+	def __init__(self, doctors: dict, timeslots: list, specialists: tuple = specialists):
+		"""
+		:param doctors: {doctor: [available timeslots]}, doctors are tried in this order
+		:param timeslots: the timeslots of the day in order
+		:param specialists: the doctors who can see specialist patients
+		"""
+		self.availability = Availability(doctors, timeslots, specialists)
+		self.timeslots = self.availability.timeslots
+		self.position = self.availability.position
+		self.specialists = set(specialists)
+		self.current = 0
+		self.output = {}
+
+		self.arrivals = {}
+		self.waiting = {True: [], False: []}
+		self.count = 0
+
+	def add_patient(self, name: str, priority: int, specialist: bool, timeslot: int):
+		"""
+		Adds a patient who wants to be seen from timeslot onwards, or from the current slot if that has passed
+		"""
+		if timeslot not in self.position:
+			raise ValueError("{} is not a timeslot".format(timeslot))
+		# Checked now, patients for later slots only reach the heap when their slot closes
+		if not isinstance(priority, numbers.Integral):
+			raise TypeError("Priority {!r} is not an integer".format(priority))
+		hash(name)
+
+		entry = (priority, self.count, name, bool(specialist))
+		self.count += 1
+		position = self.position[timeslot]
+		if position <= self.current:
+			self._enqueue(entry, self.current)
 		else:
-			cur_doc = possible_doctors[0]
-			output[cur_patient] = [timeslot, cur_doc]
-			doctors[cur_doc].remove(timeslot)
-			possible_doctors.remove(cur_doc)
-			possible_patients.remove(cur_patient)
-			for p in possible_patients:
-				patients[p][0] += 1
-				patients[p][2] = timeslots[timeslots.index(timeslot) + 1]
-			del patients[cur_patient]
+			self.arrivals.setdefault(position, []).append(entry)
+
+	def _enqueue(self, entry: tuple, position: int):
+		priority, order, name, specialist = entry
+		heapq.heappush(self.waiting[specialist], (position - priority, order, name))
+
+	def set_available(self, doctor, timeslot: int, available: bool = True):
+		"""
+		Adds or removes a doctor's availability for a timeslot that has not been closed yet
+		"""
+		position = self.position[timeslot]
+		if position < self.current:
+			raise ValueError("{} has already been scheduled".format(timeslot))
+
+		if doctor not in self.availability.index:
+			self.availability.add_doctor(doctor, doctor in self.specialists)
+		self.availability.set(self.availability.index[doctor], position, available)
+
+	def close_slot(self) -> list:
+		"""
+		Assigns the patients waiting in the current slot and moves on to the next one
+
+		:return: returns the assignments made as [name, timeslot, doctor] lists
+		"""
+		if self.current >= len(self.timeslots):
+			raise ValueError("All timeslots have been scheduled")
+
+		timeslot = self.timeslots[self.current]
+		for entry in self.arrivals.pop(self.current, ()):
+			self._enqueue(entry, self.current)
+
+		assignments = []
+		for specialist in (True, False):
+			queue = self.waiting[specialist]
+			if not queue:
+				continue
+			for doctor in self.availability.free(self.current, specialist).tolist():
+				if not queue:
+					break
+				name = heapq.heappop(queue)[2]
+				self.availability.book(doctor, self.current)
+				doctor = self.availability.doctors[doctor]
+				assignments.append([name, timeslot, doctor])
+				self.output[name] = [timeslot, doctor]
+
+		self.current += 1
+		return assignments
+
+	def run(self) -> dict:
+		"""
+		Closes every remaining slot
+
+		:return: returns {name: [timeslot, doctor]} of every patient seen
+		"""
+		while self.current < len(self.timeslots):
+			self.close_slot()
+		return self.output
+
+	def unscheduled(self) -> dict:
+		"""
+		Returns the patients still waiting as {name: [priority, needs_specialist, timeslot]}, with the priority they
+		have at the current slot. Patients who have not arrived yet are not included.
+		"""
+		waiting = {}
+		for specialist, queue in self.waiting.items():
+			for key, order, name in sorted(queue):
+				waiting[name] = [self.current - key, specialist, self.timeslots[self.current] if self.current < len(self.timeslots) else None]
+		return waiting
+
+
+def schedule(patients: dict, doctors: dict, timeslots: list, specialists: tuple = specialists) -> dict:
+	"""
+	Schedules a whole day without modifying any of the arguments
+
+	:param patients: {name: [priority, needs_specialist, timeslot]}
+	:param doctors: {doctor: [available timeslots]}
+	:param timeslots: the timeslots of the day in order
+	:param specialists: the doctors who can see specialist patients
+	:return: returns {name: [timeslot, doctor]} of every patient seen
+	"""
+	scheduler = Scheduler(doctors, timeslots, specialists)
+	for name, (priority, specialist, timeslot) in patients.items():
+		scheduler.add_patient(name, priority, specialist, timeslot)
+	return scheduler.run()
+
+
+def main():
+	print(schedule(patients, doctors, timeslots))
+
+
+class Test_Scheduler(unittest.TestCase):
+	def test_sample_day(self):
+		# The assignments the original script printed for the sample day
+		expected = {
+			"A": [1200, 2], "B": [1215, 2], "C": [1230, 2], "E": [1245, 2], "D": [1300, 2], "F": [1300, 1],
+			"H": [1315, 2], "G": [1315, 3], "I": [1330, 1], "J": [1345, 2], "K": [1345, 3], "M": [1430, 3],
+			"N": [1445, 3], "L": [1500, 5], "O": [1515, 5], "P": [1515, 4], "Q": [1545, 5], "R": [1600, 5],
+			"S": [1630, 5], "T": [1645, 5],
+		}
+		arguments = copy.deepcopy((patients, doctors, timeslots))
+		self.assertEqual(schedule(patients, doctors, timeslots), expected)
+		self.assertEqual((patients, doctors, timeslots), arguments)
 
-	print()
-	print(output)
-	print()
+	def test_deferred_when_no_doctor_free(self):
+		# Nobody works at 1200, the original script left X there and never saw them
+		self.assertEqual(schedule({"X": [1, False, 1200]}, {1: [1215]}, [1200, 1215, 1230]), {"X": [1215, 1]})
 
-print(output)
-# print(patients)
-# print(doctors)
+	def test_deferred_priority(self):
+		# X has waited a slot by 1215 so goes before Y, who arrived then with the same priority
+		day = schedule({"X": [1, False, 1200], "Y": [1, False, 1215]}, {1: [1215, 1230]}, [1200, 1215, 1230])
+		self.assertEqual(day, {"X": [1215, 1], "Y": [1230, 1]})
 
+	def test_unscheduled(self):
+		scheduler = Scheduler({1: [1200, 1215]}, [1200, 1215], specialists=(2,))
+		scheduler.add_patient("S", 1, True, 1200)
+		scheduler.add_patient("X", 3, False, 1215)
+		self.assertEqual(scheduler.close_slot(), [])
+		self.assertEqual(scheduler.unscheduled(), {"S": [2, True, 1215]})
+		self.assertEqual(scheduler.run(), {"X": [1215, 1]})
+		self.assertEqual(scheduler.unscheduled(), {"S": [3, True, None]})
 
 
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,158 @@
+"""
+Monte Carlo comparison of scheduling policies over random clinic days
+
+	python simulate.py --days 1000 --seed 1 --workers 4
+"""
+import argparse
+import json
+import sys
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from optimal_schedule import optimal_schedule
+from schedule import schedule
+
+POLICIES = {
+	"greedy": schedule,
+	"optimal": optimal_schedule,
+}
+
+
+def random_day(seed: int, slots: int = 21, doctors: int = 5, arrival_rate: float = 1.0, specialist_ratio: float = 0.4, specialist_doctors: float = 0.4, availability: float = 0.4, max_priority: int = 2) -> tuple:
+	"""
+	Generates a random clinic day, the same seed always gives the same day
+
+	Patients arrive in every slot with a Poisson(arrival_rate) count, each doctor works a random run of consecutive slots
+	covering about availability of the day.
+
+	:return: returns (patients, doctors, timeslots, specialists) in the form schedule takes them
+	"""
+	rng = np.random.default_rng(seed)
+	timeslots = list(range(slots))
+
+	arrivals = rng.poisson(arrival_rate, slots)
+	arrival_slots = np.repeat(np.arange(slots), arrivals)
+	priorities = rng.integers(1, max_priority + 1, len(arrival_slots))
+	needs_specialist = rng.random(len(arrival_slots)) < specialist_ratio
+	patients = {i: [int(priority), bool(specialist), int(slot)] for i, (priority, specialist, slot) in enumerate(zip(priorities, needs_specialist, arrival_slots))}
+
+	shift = max(1, round(availability * slots))
+	starts = rng.integers(0, slots - shift + 1, doctors)
+	roster = {doctor: list(range(start, start + shift)) for doctor, start in enumerate(starts.tolist())}
+	specialists = tuple(np.flatnonzero(rng.random(doctors) < specialist_doctors).tolist())
+
+	return patients, roster, timeslots, specialists
+
+
+def simulate_day(task: tuple) -> np.ndarray:
+	"""
+	Runs every policy on one day and returns a (policies, 4) array of patients, seen, total wait and max wait in slots
+	"""
+	seed, policies, parameters = task
+	patients, doctors, timeslots, specialists = random_day(seed, **parameters)
+	arrival = np.array([slot for priority, specialist, slot in patients.values()], dtype=float)
+
+	results = np.zeros((len(policies), 4))
+	for i, policy in enumerate(policies):
+		output = POLICIES[policy](patients, doctors, timeslots, specialists)
+		seen = np.array([name in output for name in patients], dtype=bool)
+		waits = np.array([output[name][0] for name in patients if name in output], dtype=float) - arrival[seen]
+		results[i] = len(patients), seen.sum(), waits.sum(), waits.max(initial=0)
+	return results
+
+
+def simulate(days: int, seed: int = 0, policies: list = tuple(POLICIES), workers: int = None, quiet: bool = True, chunksize: int = 16, **parameters) -> dict:
+	"""
+	Simulates days random days with every policy, in a process pool unless workers is 1
+
+	Every day gets its own seed spawned from seed, so the result does not depend on the number of workers.
+	The other parameters are passed on to random_day.
+
+	:return: returns {policy: statistics} aggregated over all days
+	"""
+	seeds = [int(day_seed.generate_state(1)[0]) for day_seed in np.random.SeedSequence(seed).spawn(days)]
+	tasks = [(day_seed, list(policies), parameters) for day_seed in seeds]
+
+	if workers == 1:
+		results = _collect(map(simulate_day, tasks), days, quiet)
+	else:
+		with ProcessPoolExecutor(workers) as executor:
+			results = _collect(executor.map(simulate_day, tasks, chunksize=chunksize), days, quiet)
+
+	return aggregate(results, policies)
+
+
+def _collect(days_done, days: int, quiet: bool) -> np.ndarray:
+	results = []
+	for result in days_done:
+		results.append(result)
+		if not quiet and len(results) % max(1, days // 10) == 0:
+			print("{}/{} days".format(len(results), days), file=sys.stderr)
+	return np.stack(results)
+
+
+def aggregate(results: np.ndarray, policies: list) -> dict:
+	"""
+	Reduces the (days, policies, 4) per day results to statistics per policy
+	"""
+	patients, seen, total_wait, max_wait = np.moveaxis(results, 2, 0)
+	unscheduled = patients - seen
+	mean_wait = total_wait.sum(axis=0) / np.maximum(seen.sum(axis=0), 1)
+
+	return {
+		policy: {
+			"days": len(results),
+			"throughput": float(seen[:, i].mean()),
+			"mean_wait": float(mean_wait[i]),
+			"max_wait": float(max_wait[:, i].max(initial=0)),
+			"unscheduled": int(unscheduled[:, i].sum()),
+			"days_with_unscheduled": int((unscheduled[:, i] > 0).sum()),
+		}
+		for i, policy in enumerate(policies)
+	}
+
+
+class Test_Simulate(unittest.TestCase):
+	def test_random_day(self):
+		self.assertEqual(random_day(7), random_day(7))
+		self.assertNotEqual(random_day(7), random_day(8))
+		patients, doctors, timeslots, specialists = random_day(7, slots=10, doctors=3)
+		self.assertEqual(timeslots, list(range(10)))
+		self.assertEqual(len(doctors), 3)
+		self.assertTrue(all(slot in timeslots for priority, specialist, slot in patients.values()))
+
+	def test_workers(self):
+		# Every day has its own seed, so the pool gives the same result as a single process
+		self.assertEqual(simulate(days=20, seed=0, workers=1), simulate(days=20, seed=0, workers=2, chunksize=3))
+
+	def test_aggregate(self):
+		# (days, policies, [patients, seen, total wait, max wait])
+		results = np.array([
+			[[10, 8, 6, 3], [10, 10, 5, 2]],
+			[[4, 4, 2, 1], [4, 3, 1, 1]],
+		], dtype=float)
+		statistics = aggregate(results, ["greedy", "optimal"])
+		self.assertEqual(statistics["greedy"], {"days": 2, "throughput": 6.0, "mean_wait": 8 / 12, "max_wait": 3.0, "unscheduled": 2, "days_with_unscheduled": 1})
+		self.assertEqual(statistics["optimal"], {"days": 2, "throughput": 6.5, "mean_wait": 6 / 13, "max_wait": 2.0, "unscheduled": 1, "days_with_unscheduled": 1})
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Compare scheduling policies over random clinic days")
+	parser.add_argument("--days", type=int, default=1000)
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--workers", type=int, default=None)
+	parser.add_argument("--policies", nargs="+", choices=POLICIES, default=list(POLICIES))
+	parser.add_argument("--arrival-rate", type=float, default=1.0)
+	parser.add_argument("--specialist-ratio", type=float, default=0.4)
+	parser.add_argument("--doctors", type=int, default=5)
+	parser.add_argument("--quiet", action="store_true", help="only print the final statistics")
+	args = parser.parse_args()
+
+	statistics = simulate(args.days, args.seed, args.policies, args.workers, args.quiet, arrival_rate=args.arrival_rate, specialist_ratio=args.specialist_ratio, doctors=args.doctors)
+	print(json.dumps(statistics, indent=2))
+
+
+if __name__ == '__main__':
+	main()
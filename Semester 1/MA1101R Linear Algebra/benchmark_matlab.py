@@ -0,0 +1,88 @@
+"""
+Benchmarks the exact (Bareiss) mode of matlab.py against sympy's Matrix.rref
+
+    python benchmark_matlab.py --sizes 25 50 100 200 --sympy-max 100
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+import sympy
+
+from matlab import MatLab
+
+
+def random_integer_matrix(size, seed, low=-9, high=9, rank_deficiency=1):
+    """
+    Square random integer matrix whose last rank_deficiency columns are sums of two earlier ones
+    """
+    rng = np.random.default_rng(seed)
+    matrix = rng.integers(low, high + 1, (size, size))
+    for col in range(size - rank_deficiency, size):
+        matrix[:, col] = matrix[:, col - size + rank_deficiency] + matrix[:, col - size + rank_deficiency + 1]
+    return matrix
+
+
+def best_of(function, repeat):
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+    return min(seconds)
+
+
+def run(sizes, repeat, seed, sympy_max, quiet=False):
+    exact = MatLab(exact=True)
+    results = []
+    for size in sizes:
+        matrix = random_integer_matrix(size, seed)
+        benchmarks = {
+            ("rank", "bareiss"): lambda: exact.get_dimension(matrix),
+            ("rref", "bareiss"): lambda: exact.rref(matrix),
+            ("null_space", "bareiss"): lambda: exact.get_null_space(matrix),
+        }
+        if size <= sympy_max:
+            benchmarks[("rref", "sympy")] = lambda: sympy.Matrix(matrix).rref()
+
+        for (operation, implementation), function in benchmarks.items():
+            result = {"size": size, "operation": operation, "implementation": implementation, "best": best_of(function, repeat)}
+            results.append(result)
+            if not quiet:
+                print("n={size:<5} {operation:<11} {implementation:<8} {best:10.4f}s".format(**result), file=sys.stderr)
+
+        # Both implementations have to agree on the answer
+        if size <= sympy_max:
+            reduced, pivots = exact.rref(matrix)
+            expected, expected_pivots = sympy.Matrix(matrix).rref()
+            if list(np.flatnonzero(pivots)) != list(expected_pivots) or reduced.tolist() != expected.tolist():
+                raise AssertionError("The Bareiss rref of the {0}x{0} matrix differs from sympy's".format(size))
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "sympy": sympy.__version__,
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the exact mode of matlab.py against sympy")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25, 50, 100, 200])
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sympy-max", type=int, default=100, help="skip sympy for larger matrices")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.sizes, args.repeat, args.seed, args.sympy_max, args.quiet), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,44 +1,290 @@
 import numpy as np
 import logging
+import unittest
+from fractions import Fraction
+from math import gcd, lcm
+
+_to_fraction = np.frompyfunc(Fraction, 2, 1)
 
 
 class MatLab:
-    def __init__(self):
-        pass
+    def __init__(self, tol=None, exact=False):
+        """
+        :param tol: entries with an absolute value up to tol count as zero, by default
+        max(rows, cols) * eps * the largest absolute entry of each matrix, like np.linalg.matrix_rank
+        :param exact: work with exact integers and fractions using fraction-free (Bareiss) elimination instead of floats,
+        the results are then arrays of Fractions
+        """
+        self.tol = tol
+        self.exact = exact
+
+    def _tolerance(self, solved):
+        if self.tol is not None:
+            return np.full(len(solved), self.tol, dtype=float)
+        rows, cols = solved.shape[1:]
+        return max(rows, cols) * np.finfo(solved.dtype).eps * np.abs(solved).max(axis=(1, 2), initial=0)
 
     def rref(self, matrix):
         """
-        Returns a copy of the original matrix in reduced row echelon form
-        :param matrix: numpy array
-        :return: numpy array
+        Returns a copy of the original matrix in reduced row echelon form, using Gauss-Jordan elimination with
+        partial pivoting
+
+        A 3-D array is treated as a stack of matrices that are all reduced together, one column at a time.
+        :param matrix: numpy array of shape (rows, cols) or (matrices, rows, cols)
+        :return: returns (reduced matrix, pivots) where pivots is a boolean array of shape (cols,) or
+        (matrices, cols) marking the pivot columns
+        """
+        if self.exact:
+            return self._exact_rref(matrix)
+
+        solved = np.array(matrix, dtype=float)
+        single = solved.ndim == 2
+        if single:
+            solved = solved[np.newaxis]
+        if solved.ndim != 3:
+            raise ValueError("Expected a matrix or a stack of matrices, got shape {}".format(np.shape(matrix)))
+
+        count, rows, cols = solved.shape
+        tol = self._tolerance(solved)
+        pivots = np.zeros((count, cols), dtype=bool)
+        pivot_row = np.zeros(count, dtype=int)
+        matrices = np.arange(count)
+        row_index = np.arange(rows)
+
+        for col in range(cols):
+            if rows == 0:
+                break
+            # The largest entry in the column on or below each matrix's next pivot row
+            candidates = np.where(row_index >= pivot_row[:, np.newaxis], np.abs(solved[:, :, col]), -1)
+            best = candidates.argmax(axis=1)
+            found = (candidates[matrices, best] > tol) & (pivot_row < rows)
+            if not found.any():
+                continue
+
+            m, target, source = matrices[found], pivot_row[found], best[found]
+            solved[m, target], solved[m, source] = solved[m, source], solved[m, target]
+            solved[m, target] /= solved[m, target, col][:, np.newaxis]
+
+            # Clear the column in every other row with one rank-1 update per matrix
+            factors = solved[m, :, col]
+            factors[np.arange(len(m)), target] = 0
+            solved[m] -= factors[:, :, np.newaxis] * solved[m, target][:, np.newaxis, :]
+
+            pivots[m, col] = True
+            pivot_row[m] += 1
+
+        solved[np.abs(solved) <= tol[:, np.newaxis, np.newaxis]] = 0
+
+        if single:
+            return solved[0], pivots[0]
+        return solved, pivots
+
+    def _exact_rref(self, matrix):
+        matrix = np.asarray(matrix, dtype=object)
+        if matrix.ndim == 3:
+            results = [self._exact_rref(single) for single in matrix]
+            return np.array([result[0] for result in results], dtype=object).reshape(matrix.shape), np.array([result[1] for result in results], dtype=bool).reshape(matrix.shape[0], -1)
+
+        solved, pivots = self.bareiss(matrix)
+        divisor = solved[0, np.flatnonzero(pivots)[0]] if pivots.any() else 1
+        return _to_fraction(solved, divisor), pivots
+
+    @staticmethod
+    def _integer_rows(matrix):
+        """
+        Returns the matrix as an object array of Python ints, every row of fractions is scaled by the lcm of its
+        denominators which leaves the row space unchanged
+        """
+        matrix = np.array(matrix, dtype=object)
+        if matrix.ndim != 2:
+            raise ValueError("Expected a matrix, got shape {}".format(matrix.shape))
+
+        rows = []
+        for row in matrix:
+            row = [Fraction(value) for value in row]
+            scale = lcm(1, *(value.denominator for value in row))
+            rows.append([int(value * scale) for value in row])
+        return np.array(rows, dtype=object).reshape(matrix.shape)
+
+    def bareiss(self, matrix, reduce=True):
+        """
+        Fraction-free Gauss-Jordan elimination on integers
+
+        Each step replaces every other row with (pivot * row - entry * pivot row) / previous pivot, a division that is
+        always exact, so the entries stay integers no bigger than minors of the matrix. Once every pivot column has been
+        eliminated all pivots equal the last one, d, and the reduced row echelon form of the matrix is the result / d.
+        :param matrix: integer or Fraction matrix
+        :param reduce: eliminate above the pivots as well, otherwise only below them which gives a row echelon form,
+        enough for the rank
+        :return: returns (integer object array, pivots) where pivots is a boolean array marking the pivot columns
         """
+        solved = self._integer_rows(matrix)
+        rows, cols = solved.shape
+        pivots = np.zeros(cols, dtype=bool)
+        previous = 1
+        row = 0
+
+        for col in range(cols):
+            if row == rows:
+                break
+            nonzero = np.flatnonzero(solved[row:, col] != 0)
+            if not len(nonzero):
+                continue
+
+            # Exact arithmetic does not need the largest pivot, only a non-zero one
+            source = row + nonzero[0]
+            if source != row:
+                solved[[row, source]] = solved[[source, row]]
+            pivot = solved[row, col]
+
+            # Rows below the pivot row are zero left of col, rows above only in the earlier non-pivot columns
+            # and in their own pivot column, which is set at the end
+            if reduce:
+                others = np.delete(np.arange(rows), row)
+                active = np.concatenate([np.flatnonzero(~pivots[:col]), np.arange(col, cols)])
+            else:
+                others = np.arange(row + 1, rows)
+                active = np.arange(col, cols)
+            block = solved[np.ix_(others, active)]
+            factors = solved[others, col:col + 1]
+            solved[np.ix_(others, active)] = (pivot * block - factors * solved[row, active]) // previous
+
+            pivots[col] = True
+            previous = pivot
+            row += 1
+
+        if reduce:
+            # Every pivot of a fully reduced matrix equals the last one
+            solved[np.arange(row), np.flatnonzero(pivots)] = previous
+
+        return solved, pivots
+
+    def get_basis(self, matrix):
+        """
+        Returns the pivot columns of the matrix, which form a basis for its column space
+        """
+        matrix = np.asarray(matrix)
+        return matrix[:, self.rref(matrix)[1]]
+
+    def get_dimension(self, matrix):
+        """
+        Returns the dimension of the column space of the matrix, its rank
+        """
+        if self.exact:
+            return int(self.bareiss(matrix, reduce=False)[1].sum())
+        return int(self.rref(matrix)[1].sum())
+
+    def get_null_space(self, matrix):
+        """
+        Returns a basis for the null space of the matrix as the columns of a matrix, one for every non-pivot column
+        """
+        solved, pivots = self.rref(matrix)
+        free = np.flatnonzero(~pivots)
+        basis = np.zeros((len(pivots), len(free)), dtype=solved.dtype)
+        basis[pivots] = -solved[:pivots.sum(), free]
+        basis[free, np.arange(len(free))] = 1
+
+        if self.exact:
+            # Scale every vector to coprime integers
+            for i in range(len(free)):
+                scale = lcm(1, *(value.denominator for value in basis[:, i]))
+                vector = [int(value * scale) for value in basis[:, i]]
+                basis[:, i] = [Fraction(value, gcd(*vector)) for value in vector]
+        return basis
+
+    def extend_basis(self, matrix):
+        """
+        Extends the linearly independent columns of the matrix to a basis for R^n with standard basis vectors
+        """
+        matrix = np.asarray(matrix, dtype=object if self.exact else None)
+        identity = np.identity(len(matrix), dtype=int).astype(object) if self.exact else np.identity(len(matrix))
+        augmented = np.hstack([matrix, identity])
+        pivots = self.rref(augmented)[1]
+        if not pivots[:matrix.shape[1]].all():
+            raise ValueError("The columns are not linearly independent")
+        return augmented[:, pivots]
+
+
+class Test_MatLab(unittest.TestCase):
+    def setUp(self):
+        import sympy
+        self.sympy = sympy
+        rng = np.random.default_rng(0)
+        # Rank deficient: the last column is the sum of the first two and the last row repeats the first
+        square = rng.integers(-9, 10, (6, 6))
+        square[:, -1] = square[:, 0] + square[:, 1]
+        square[-1] = square[0]
+        wide = rng.integers(-5, 6, (3, 7))
+        wide[2] = 2 * wide[0] - wide[1]
+        self.matrices = [square, wide, wide.T, np.array([[0, 0, 1], [0, 2, 0], [0, 0, 0]]), np.zeros((2, 3), dtype=int)]
+        self.fractions = np.array([[Fraction(1, 2), Fraction(2, 3), Fraction(7, 6)], [Fraction(1, 3), Fraction(-1, 5), Fraction(2, 15)], [1, 2, 3]], dtype=object)
+
+    def expected_rref(self, matrix):
+        reduced, pivots = self.sympy.Matrix(matrix.tolist()).rref()
+        fractions = [[Fraction(int(value.p), int(value.q)) for value in row] for row in reduced.tolist()]
+        return np.array(fractions, dtype=object).reshape(matrix.shape), list(pivots)
 
-        solved = matrix.tolist()
-        rows, cols = solved.shape()
+    def test_rref(self):
+        for matrix in self.matrices:
+            expected, expected_pivots = self.expected_rref(matrix)
+            solved, pivots = MatLab().rref(matrix)
+            np.testing.assert_allclose(solved, expected.astype(float), atol=1e-12)
+            self.assertEqual(list(np.flatnonzero(pivots)), expected_pivots)
 
-        # Arrange the rows so that they are sorted in terms of their leading entries
-        def leading_non_zero(row):
-            return next((index for index, value in enumerate(row) if value != 0), cols )
+    def test_exact_rref(self):
+        for matrix in self.matrices + [self.fractions]:
+            expected, expected_pivots = self.expected_rref(matrix)
+            solved, pivots = MatLab(exact=True).rref(matrix)
+            self.assertEqual(solved.tolist(), expected.tolist())
+            self.assertEqual(list(np.flatnonzero(pivots)), expected_pivots)
 
-        solved.sort(key=leading_non_zero, reverse=False)
-        solved = np.array(solved)
+    def test_batched_rref(self):
+        stack = np.array([self.matrices[0], self.matrices[0].T, np.identity(6, dtype=int)])
+        for exact in (False, True):
+            solved, pivots = MatLab(exact=exact).rref(stack)
+            for i, matrix in enumerate(stack):
+                expected, expected_pivots = MatLab(exact=exact).rref(matrix)
+                self.assertEqual(solved[i].tolist(), expected.tolist())
+                self.assertEqual(pivots[i].tolist(), expected_pivots.tolist())
 
-        return solved
+    def test_rank_and_null_space(self):
+        for matrix in self.matrices + [self.fractions]:
+            sympy_matrix = self.sympy.Matrix(matrix.tolist())
+            self.assertEqual(MatLab(exact=True).get_dimension(matrix), sympy_matrix.rank())
+            null_space = MatLab(exact=True).get_null_space(matrix)
+            self.assertEqual(null_space.shape[1], len(sympy_matrix.nullspace()))
+            self.assertTrue((matrix.dot(null_space) == 0).all())
+            if matrix.dtype != object:
+                self.assertEqual(MatLab().get_dimension(matrix), sympy_matrix.rank())
 
-    def get_basis(self):
-        pass
+    def test_bareiss(self):
+        solved, pivots = MatLab().bareiss(self.matrices[0])
+        expected, expected_pivots = self.expected_rref(self.matrices[0])
+        # Every pivot ends up as the same integer d, and the result / d is the reduced row echelon form
+        divisor = solved[0, np.flatnonzero(pivots)[0]]
+        self.assertTrue(all(isinstance(value, int) for value in solved.flat))
+        self.assertEqual(_to_fraction(solved, divisor).tolist(), expected.tolist())
 
-    def get_dimension(self):
-        pass
+        echelon, echelon_pivots = MatLab().bareiss(self.matrices[0], reduce=False)
+        self.assertEqual(echelon_pivots.tolist(), pivots.tolist())
+        self.assertTrue((np.tril(echelon, -1) == 0).all())
 
-    def extend_basis(self):
-        pass
+    def test_extend_basis(self):
+        columns = np.array([[1, 2], [2, 4], [0, 1]])
+        for exact in (False, True):
+            basis = MatLab(exact=exact).extend_basis(columns)
+            self.assertEqual(basis.shape, (3, 3))
+            self.assertEqual(self.sympy.Matrix(basis.tolist()).rank(), 3)
+        with self.assertRaises(ValueError):
+            MatLab().extend_basis(np.array([[1, 2], [2, 4], [3, 6]]))
 
 
 def main():
     logging.basicConfig(format='[*] %(message)s', level=logging.DEBUG)
     a = np.array([[0, 0, 1], [0, 2, 0], [0, 0, 0]])
-    print(MatLab().rref(a))
+    solved, pivots = MatLab().rref(a)
+    print(solved)
+    logging.debug("Pivot columns: {}".format(np.flatnonzero(pivots)))
 
 
 if __name__ == '__main__':
@@ -1,3 +1,12 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import unittest
+import warnings
+from unittest import mock
+
 import numpy as np
 
 
@@ -16,22 +25,434 @@ def gen_el_ma(cur, i):
         return (gen_el_ma(cur, i + 1)).dot(new)
 
 
-def solve_sim(arr):
-    n = len(arr)
-    ans = []
-    print(arr)
+def back_substitution(upper, rhs):
+    """
+    Solves upper x = rhs for upper triangular matrices, one vectorised product per row
+    :param upper: matrix of shape (n, n) or stack of matrices of shape (m, n, n)
+    :param rhs: right hand side of shape (n,) or (m, n), or several columns of shape (n, k) or (m, n, k)
+    :return: returns x with the same shape as rhs
+    """
+    upper = np.asarray(upper, dtype=float)
+    vector = np.ndim(rhs) == upper.ndim - 1
+    x = np.array(rhs, dtype=float)
+    if vector:
+        x = x[..., np.newaxis]
+
+    n = upper.shape[-1]
     for i in range(n - 1, -1, -1):
-        total = arr[i][-1]
-        target = i
-        cur = target + 1
-        for j in range(len(ans)):
-            total -= ans[j] * arr[i][cur]
-            cur += 1
-        ans.insert(0, total / arr[i][target])
-    return ans
+        x[..., i, :] -= (upper[..., i:i + 1, i + 1:] @ x[..., i + 1:, :])[..., 0, :]
+        x[..., i, :] /= upper[..., i, i, np.newaxis]
 
+    return x[..., 0] if vector else x
 
-def main():
+
+def solve_sim(arr, verbose=False):
+    """
+    Solves augmented upper triangular systems [U | b] by back substitution
+    :param arr: augmented matrix of shape (n, n + k) or stack of them of shape (m, n, n + k)
+    :param verbose: print the augmented matrix first
+    :return: returns the solutions, of shape (n,) for a single right hand side and (n, k) otherwise, with a leading
+    m for a stack
+    """
+    arr = np.asarray(arr)
+    if verbose:
+        print(arr)
+    n = arr.shape[-2]
+    rhs = arr[..., n:]
+    if rhs.shape[-1] == 1:
+        rhs = rhs[..., 0]
+    return back_substitution(arr[..., :n], rhs)
+
+
+def eliminate(arr, scales=None):
+    """
+    Gaussian elimination with partial pivoting on a stack of augmented matrices at once
+    :param arr: augmented matrices of shape (m, n, n + k), modified in place
+    :param scales: optional (m, n) values that are swapped along with the rows, modified in place
+    :return: returns (arr, pivots), arr now upper triangular in its first n columns and pivots the (m, n) absolute
+    values of the pivots, a zero pivot means the system is singular
+    """
+    count, n = arr.shape[:2]
+    systems = np.arange(count)
+    for i in range(n):
+        best = i + np.argmax(np.abs(arr[:, i:, i]), axis=1)
+        swap = best != i
+        if swap.any():
+            arr[systems[swap], i], arr[systems[swap], best[swap]] = arr[systems[swap], best[swap]], arr[systems[swap], i]
+            if scales is not None:
+                scales[systems[swap], i], scales[systems[swap], best[swap]] = scales[systems[swap], best[swap]], scales[systems[swap], i]
+
+        pivot = arr[:, i, i]
+        factors = np.divide(arr[:, i + 1:, i], pivot[:, np.newaxis], out=np.zeros((count, n - i - 1)), where=pivot[:, np.newaxis] != 0)
+        arr[:, i + 1:, i:] -= factors[:, :, np.newaxis] * arr[:, i, np.newaxis, i:]
+    return arr, np.abs(np.diagonal(arr[:, :, :n], axis1=1, axis2=2))
+
+
+def pivot_ratio(pivots, scales):
+    """
+    Returns the smallest over the largest pivot, after dividing every pivot by the largest absolute entry of its row in
+    the original matrix, a cheap estimate of the reciprocal condition number
+
+    Scaling a row of the matrix scales its pivot alike, so the ratio does not change when an equation is multiplied
+    through. It is 0 if a pivot is exactly zero.
+    :param pivots: (..., n) pivots
+    :param scales: (..., n) largest absolute entry of the original row each pivot came from
+    """
+    scaled = np.divide(np.abs(pivots), scales, out=np.zeros(np.shape(pivots)), where=scales > 0)
+    largest = scaled.max(axis=-1, initial=0)
+    return np.divide(scaled.min(axis=-1, initial=np.inf), largest, out=np.zeros(np.shape(largest)), where=largest > 0)
+
+
+def is_numerically_singular(ratio, n):
+    """
+    Checks if a pivot ratio from pivot_ratio is too small for an n x n system to be solved to any accuracy
+    """
+    return ratio <= n * np.finfo(float).eps
+
+
+def solve_batch(arr):
+    """
+    Solves a stack of augmented systems with eliminate and back substitution
+    :param arr: augmented matrices of shape (m, n, n + 1)
+    :return: returns (x, ratio) where x has shape (m, n) and ratio is the pivot_ratio of every system. Numerically
+    singular systems have a ratio of 0 and NaN solutions.
+    """
+    arr = np.array(arr, dtype=float)
+    n = arr.shape[1]
+    scales = np.abs(arr[:, :, :n]).max(axis=2, initial=0)
+    upper, pivots = eliminate(arr, scales)
+    ratio = pivot_ratio(pivots, scales)
+    singular = is_numerically_singular(ratio, n)
+
+    # Give singular systems a harmless diagonal so they do not spread warnings, then blank their solutions
+    upper[singular, np.arange(n)[:, np.newaxis], np.arange(n)[:, np.newaxis]] = 1
+    x = back_substitution(upper[:, :, :n], upper[:, :, n])
+    x[singular] = np.nan
+    ratio[singular] = 0
+    return x, ratio
+
+
+def _is_array_file(path):
+    return path.endswith(".npy") or path.endswith(".npz")
+
+
+def _load_systems(path):
+    """
+    Returns the systems of a .npy file, memory mapped, or of a .npz file, its "systems" array or else its first, as an
+    array of shape (m, n, n + 1)
+    """
+    systems = np.load(path, mmap_mode="r")
+    if path.endswith(".npz"):
+        # Arrays in an .npz are read whole when accessed, they cannot be memory mapped
+        systems = systems["systems"] if "systems" in systems.files else systems[systems.files[0]]
+    if systems.ndim == 2:
+        systems = systems[np.newaxis]
+    return systems
+
+
+def _chunks(systems, chunk_size):
+    for start in range(0, len(systems), chunk_size):
+        yield systems[start:start + chunk_size]
+
+
+def read_systems(path, chunk_size):
+    """
+    Yields chunks of augmented systems of shape (m, n, n + 1) from a .npy file, memory mapped, a .npz file, its
+    "systems" array or else its first, or a text file, "-" for stdin, of systems separated by blank lines
+    """
+    if _is_array_file(path):
+        yield from _chunks(_load_systems(path), chunk_size)
+        return
+
+    f = sys.stdin if path == "-" else open(path)
+    try:
+        chunk, rows = [], []
+        for line in f:
+            if line.strip():
+                rows.append(line.split())
+            elif rows:
+                chunk.append(rows)
+                rows = []
+            if len(chunk) == chunk_size:
+                yield np.array(chunk, dtype=float)
+                chunk = []
+        if rows:
+            chunk.append(rows)
+        if chunk:
+            yield np.array(chunk, dtype=float)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _solve_chunks(chunks, write, report, rcond):
+    """
+    Solves every chunk, passing (index of its first system, solutions) to write and reporting the systems whose pivot
+    ratio is below rcond
+    :return: returns (systems solved, systems reported, unknowns per system)
+    """
+    n = None
+    solved = reported = 0
+    for chunk in chunks:
+        if chunk.shape[2] != chunk.shape[1] + 1:
+            raise ValueError("Expected augmented systems of shape (n, n + 1), got {}".format(chunk.shape[1:]))
+        if n is not None and chunk.shape[1] != n:
+            raise ValueError("Every system must have {} unknowns, got {}".format(n, chunk.shape[1]))
+        n = chunk.shape[1]
+
+        x, ratio = solve_batch(chunk)
+        write(solved, x)
+
+        for i in np.flatnonzero(ratio < rcond):
+            status = "singular" if ratio[i] == 0 else "ill-conditioned"
+            report.write(json.dumps({"index": solved + int(i), "status": status, "pivot_ratio": float(ratio[i])}) + "\n")
+            reported += 1
+        solved += len(chunk)
+    return solved, reported, n or 0
+
+
+def solve_file(input_path, output_path, report_path, chunk_size=65536, rcond=1e-12):
+    """
+    Solves every system in the input in chunks and writes the solutions to an (m, n) .npy file through a memory map
+
+    Singular systems get NaN solutions, they and the systems whose pivot ratio is below rcond are written to the
+    report file as JSON lines of index, status and pivot_ratio.
+    :return: returns (systems solved, systems reported)
+    """
+    with open(report_path, "w") as report:
+        if _is_array_file(input_path):
+            # The number of systems is known up front, so the solutions go straight into the output
+            systems = _load_systems(input_path)
+            if systems.shape[2] != systems.shape[1] + 1:
+                raise ValueError("Expected augmented systems of shape (n, n + 1), got {}".format(systems.shape[1:]))
+            solutions = np.lib.format.open_memmap(output_path, mode="w+", dtype=float, shape=systems.shape[:2])
+
+            def write(start, x):
+                solutions[start:start + len(x)] = x
+
+            # Chunk the array already loaded, an .npz member is read whole every time it is loaded
+            solved, reported, n = _solve_chunks(_chunks(systems, chunk_size), write, report, rcond)
+            solutions.flush()
+            del solutions
+            return solved, reported
+
+        # The number of systems in a text stream is only known at the end, so the solutions go through a raw file first
+        raw_path = output_path + ".part"
+        with open(raw_path, "wb") as raw:
+            solved, reported, n = _solve_chunks(read_systems(input_path, chunk_size), lambda start, x: raw.write(x.tobytes()), report, rcond)
+
+    solutions = np.lib.format.open_memmap(output_path, mode="w+", dtype=float, shape=(solved, n))
+    if solved and n:
+        written = np.memmap(raw_path, dtype=float, mode="r", shape=(solved, n))
+        for start in range(0, solved, chunk_size):
+            solutions[start:start + chunk_size] = written[start:start + chunk_size]
+        del written
+    solutions.flush()
+    del solutions
+    os.remove(raw_path)
+
+    return solved, reported
+
+
+class LUSolver:
+    """
+    Factors a square matrix once as P A = L U with partial pivoting, then solves A x = b for any number of right hand
+    sides by forward and back substitution, O(n^2) per right hand side instead of a new elimination
+
+    singular is only set for an exact zero pivot, pivot_ratio estimates how well conditioned the matrix is with the
+    same test solve_batch uses, and solve warns when it is numerically singular.
+    """
+    def __init__(self, matrix):
+        """
+        :param matrix: square coefficient matrix
+        """
+        lu = np.array(matrix, dtype=float)
+        if lu.ndim != 2 or lu.shape[0] != lu.shape[1]:
+            raise ValueError("Expected a square matrix, got shape {}".format(lu.shape))
+        scales = np.abs(lu).max(axis=1, initial=0)
+
+        n = len(lu)
+        self.perm = np.arange(n)
+        self.sign = 1
+        self.singular = False
+        for i in range(n):
+            # Swap the row with the largest entry in the column into the pivot position
+            pivot = i + np.argmax(np.abs(lu[i:, i]))
+            if lu[pivot, i] == 0:
+                self.singular = True
+                continue
+            if pivot != i:
+                lu[[i, pivot]] = lu[[pivot, i]]
+                self.perm[[i, pivot]] = self.perm[[pivot, i]]
+                self.sign = -self.sign
+
+            lu[i + 1:, i] /= lu[i, i]
+            lu[i + 1:, i + 1:] -= np.outer(lu[i + 1:, i], lu[i, i + 1:])
+        self.lu = lu
+        self.pivot_ratio = float(pivot_ratio(np.diag(lu), scales[self.perm]))
+
+    @property
+    def ill_conditioned(self):
+        """
+        Checks if the matrix is singular to working precision, though no pivot was exactly zero
+        """
+        return not self.singular and bool(is_numerically_singular(self.pivot_ratio, len(self.lu)))
+
+    @property
+    def L(self):
+        return np.tril(self.lu, -1) + np.identity(len(self.lu))
+
+    @property
+    def U(self):
+        return np.triu(self.lu)
+
+    @property
+    def P(self):
+        """
+        Returns the permutation matrix with P A = L U
+        """
+        return np.identity(len(self.lu))[self.perm]
+
+    @property
+    def determinant(self):
+        if self.singular:
+            return 0.0
+        return self.sign * float(np.prod(np.diag(self.lu)))
+
+    def solve(self, rhs):
+        """
+        Solves A x = rhs
+        :param rhs: vector of shape (n,) or matrix of shape (n, k) with one right hand side per column
+        :return: returns x with the same shape as rhs
+        """
+        if self.singular:
+            raise np.linalg.LinAlgError("Matrix is singular")
+        if self.ill_conditioned:
+            warnings.warn("Matrix is singular to working precision, pivot ratio {:.1e}".format(self.pivot_ratio), RuntimeWarning)
+
+        x = np.array(rhs, dtype=float)[self.perm]
+        n = len(self.lu)
+        # L has a unit diagonal, so forward substitution needs no division
+        for i in range(1, n):
+            x[i] -= self.lu[i, :i].dot(x[:i])
+        return back_substitution(self.lu, x)
+
+
+class Test_Solve_File(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.systems = rng.normal(size=(5, 3, 4))
+        self.systems[2, :, :3] = np.arange(1., 10).reshape(3, 3)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def solve(self, input_path):
+        output, report = os.path.join(self.directory.name, "x.npy"), os.path.join(self.directory.name, "report.jsonl")
+        self.assertEqual(solve_file(input_path, output, report, chunk_size=2), (5, 1))
+        # Only the input, the output and the report, no raw .part file left behind
+        self.assertEqual(len(os.listdir(self.directory.name)), 3)
+        with open(report) as f:
+            self.assertEqual([json.loads(line)["index"] for line in f], [2])
+
+        x = np.load(output)
+        expected, ratio = solve_batch(self.systems)
+        np.testing.assert_array_equal(np.isnan(x), np.isnan(expected))
+        np.testing.assert_allclose(x[~np.isnan(x)], expected[~np.isnan(expected)])
+        os.remove(output)
+        os.remove(report)
+
+    def test_npy(self):
+        path = os.path.join(self.directory.name, "systems.npy")
+        np.save(path, self.systems)
+        self.solve(path)
+
+    def test_npz(self):
+        path = os.path.join(self.directory.name, "systems.npz")
+        np.savez(path, other=np.zeros(1), systems=self.systems)
+        # An .npz member cannot be memory mapped, so it must only be loaded once
+        with mock.patch("numpy.load", wraps=np.load) as load:
+            self.solve(path)
+        self.assertEqual([call.args[0] for call in load.call_args_list].count(path), 1)
+
+    def test_text(self):
+        path = os.path.join(self.directory.name, "systems.txt")
+        with open(path, "w") as f:
+            f.write("\n\n".join("\n".join(" ".join(repr(value) for value in row.tolist()) for row in system) for system in self.systems))
+        self.solve(path)
+
+
+class Test_Solvers(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        # Needs a row swap before the first pivot
+        self.zero_pivot = np.array([[0., 2, 1], [1, 1, 1], [2, 1, 0]])
+        self.singular = [np.array([[1., 2], [2, 4]]), np.zeros((3, 3))]
+        # Singular, but rounding leaves a pivot of about 1e-16 instead of 0
+        self.rounded = np.arange(1., 10).reshape(3, 3)
+        # Invertible and exactly solvable, only badly scaled
+        self.scaled = np.array([[1e-20, 0], [0, 1.]])
+
+    def test_back_substitution(self):
+        upper = np.triu(self.rng.normal(size=(4, 5, 5))) + 5 * np.identity(5)
+        rhs = self.rng.normal(size=(4, 5, 2))
+        np.testing.assert_allclose(back_substitution(upper, rhs), np.linalg.solve(upper, rhs))
+        np.testing.assert_allclose(back_substitution(upper[0], rhs[0, :, 0]), np.linalg.solve(upper[0], rhs[0, :, 0]))
+        np.testing.assert_allclose(back_substitution(upper, rhs[:, :, 0]), np.linalg.solve(upper, rhs[:, :, :1])[:, :, 0])
+
+    def test_lu_solver(self):
+        for matrix in [self.rng.normal(size=(6, 6)), self.zero_pivot, np.array([[0., 1], [1, 0]])]:
+            solver = LUSolver(matrix)
+            np.testing.assert_allclose(solver.P @ matrix, solver.L @ solver.U, atol=1e-12)
+            self.assertAlmostEqual(solver.determinant, np.linalg.det(matrix))
+
+            rhs = self.rng.normal(size=(len(matrix), 3))
+            np.testing.assert_allclose(solver.solve(rhs), np.linalg.solve(matrix, rhs))
+            np.testing.assert_allclose(solver.solve(rhs[:, 0]), np.linalg.solve(matrix, rhs[:, 0]))
+
+    def test_lu_solver_singular(self):
+        for matrix in self.singular:
+            solver = LUSolver(matrix)
+            self.assertTrue(solver.singular)
+            self.assertEqual(solver.determinant, 0)
+            with self.assertRaises(np.linalg.LinAlgError):
+                solver.solve(np.ones(len(matrix)))
+        with self.assertRaises(ValueError):
+            LUSolver(np.ones((2, 3)))
+
+        solver = LUSolver(self.rounded)
+        self.assertFalse(solver.singular)
+        self.assertTrue(solver.ill_conditioned)
+        with self.assertWarns(RuntimeWarning):
+            solver.solve(np.ones(3))
+
+    def test_lu_solver_scaled(self):
+        solver = LUSolver(self.scaled)
+        self.assertFalse(solver.singular or solver.ill_conditioned)
+        self.assertEqual(solver.pivot_ratio, 1)
+        self.assertEqual(solver.determinant, 1e-20)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            np.testing.assert_array_equal(solver.solve([1e-20, 1]), [1, 1])
+
+    def test_solve_batch(self):
+        matrices = np.concatenate([self.rng.normal(size=(5, 3, 3)), [self.zero_pivot], [self.rounded], self.singular[1:]])
+        rhs = self.rng.normal(size=(len(matrices), 3))
+        x, ratio = solve_batch(np.concatenate([matrices, rhs[:, :, np.newaxis]], axis=2))
+
+        regular = np.arange(6)
+        np.testing.assert_allclose(x[regular], np.linalg.solve(matrices[regular], rhs[regular, :, np.newaxis])[:, :, 0])
+        self.assertTrue((ratio[regular] > 0).all())
+        self.assertTrue(np.isnan(x[6:]).all())
+        np.testing.assert_array_equal(ratio[6:], 0)
+
+        x, ratio = solve_batch([np.hstack([self.scaled, [[1e-20], [1]]])])
+        np.testing.assert_array_equal(x, [[1, 1]])
+        np.testing.assert_array_equal(ratio, [1])
+
+
+def example():
     # ans is x=2, y=3
     a = np.array([
       [1, 3, 5, 31],
@@ -46,6 +467,26 @@ def main():
     result = solve_sim(arr)
     print(result)
 
+    solver = LUSolver(a[:, :-1])
+    print(solver.solve(a[:, -1]), solver.determinant)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve batches of augmented systems, or the example without arguments")
+    parser.add_argument("input", nargs="?", help=".npy or .npz of shape (m, n, n + 1), or a text file (- for stdin) of systems separated by blank lines")
+    parser.add_argument("--output", default="solutions.npy", help=".npy file for the (m, n) solutions")
+    parser.add_argument("--report", default="singular.jsonl", help="file listing the singular and ill-conditioned systems")
+    parser.add_argument("--chunk-size", type=int, default=65536, help="systems solved per vectorised call")
+    parser.add_argument("--rcond", type=float, default=1e-12, help="report systems whose pivot ratio is below this")
+    args = parser.parse_args()
+
+    if args.input is None:
+        example()
+        return
+
+    solved, reported = solve_file(args.input, args.output, args.report, args.chunk_size, args.rcond)
+    print("Solved {} systems, {} reported in {}".format(solved, reported, args.report))
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,386 @@
+"""
+Sparse matrices and iterative solvers for large simultaneous equations, in NumPy only
+
+Memory and the work per iteration are O(n + non-zeros). Matrices are read from triplet files with lines of
+"row column value", 0-indexed, where repeated entries are added together.
+
+    python sparse_solver.py matrix.txt --rhs rhs.txt --method cg --tol 1e-10 --output x.npy
+"""
+import argparse
+import unittest
+
+import numpy as np
+
+from simultaneous_equation_solver import back_substitution
+
+
+class SparseMatrix:
+    """
+    Compressed sparse row matrix: the columns and values of row i are indices[indptr[i]:indptr[i + 1]] and
+    data[indptr[i]:indptr[i + 1]], sorted by column
+    """
+    def __init__(self, indptr, indices, data, shape):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.data = np.asarray(data, dtype=float)
+        self.shape = tuple(shape)
+        # The row of every stored entry, so products are one bincount
+        self._rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+
+    @classmethod
+    def from_triplets(cls, rows, cols, values, shape=None):
+        """
+        Builds the matrix from COO triplets, adding up repeated (row, col) entries
+        :param shape: (rows, cols), by default just big enough for the largest indices
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        values = np.asarray(values, dtype=float)
+        if shape is None:
+            shape = (int(rows.max(initial=-1)) + 1, int(cols.max(initial=-1)) + 1)
+        if len(rows) and (rows.min() < 0 or cols.min() < 0 or rows.max() >= shape[0] or cols.max() >= shape[1]):
+            raise ValueError("Triplet indices out of range for shape {}".format(shape))
+
+        keys = rows * shape[1] + cols
+        keys, inverse = np.unique(keys, return_inverse=True)
+        data = np.bincount(inverse, weights=values, minlength=len(keys))
+        rows, cols = np.divmod(keys, shape[1])
+
+        indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=shape[0]), out=indptr[1:])
+        return cls(indptr, cols, data, shape)
+
+    @classmethod
+    def from_triplet_file(cls, path, shape=None, comments="#"):
+        """
+        Loads a whitespace separated file with lines of "row column value"
+        """
+        triplets = np.loadtxt(path, comments=comments, ndmin=2)
+        if triplets.shape[1] != 3:
+            raise ValueError("Triplet lines must have 3 columns")
+        return cls.from_triplets(triplets[:, 0].astype(np.int64), triplets[:, 1].astype(np.int64), triplets[:, 2], shape)
+
+    @classmethod
+    def from_dense(cls, matrix):
+        matrix = np.asarray(matrix, dtype=float)
+        rows, cols = np.nonzero(matrix)
+        return cls.from_triplets(rows, cols, matrix[rows, cols], matrix.shape)
+
+    def to_triplets(self):
+        return self._rows.copy(), self.indices.copy(), self.data.copy()
+
+    def to_dense(self):
+        dense = np.zeros(self.shape)
+        dense[self._rows, self.indices] = self.data
+        return dense
+
+    def transpose(self):
+        return SparseMatrix.from_triplets(self.indices, self._rows, self.data, self.shape[::-1])
+
+    def dot(self, x):
+        """
+        Returns the matrix times the vector x
+        """
+        return np.bincount(self._rows, weights=self.data * x[self.indices], minlength=self.shape[0])
+
+    __matmul__ = dot
+
+    def diagonal(self):
+        diagonal = np.zeros(min(self.shape))
+        on_diagonal = self._rows == self.indices
+        diagonal[self._rows[on_diagonal]] = self.data[on_diagonal]
+        return diagonal
+
+    def is_symmetric(self, tol=0):
+        if self.shape[0] != self.shape[1]:
+            return False
+        transpose = self.transpose()
+        return np.array_equal(self.indptr, transpose.indptr) and np.array_equal(self.indices, transpose.indices) and np.allclose(self.data, transpose.data, rtol=0, atol=tol)
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    @property
+    def nbytes(self):
+        return self.indptr.nbytes + self.indices.nbytes + self.data.nbytes + self._rows.nbytes
+
+
+def jacobi(matrix):
+    """
+    Returns the Jacobi preconditioner, division by the diagonal, leaving rows without a diagonal entry alone
+    """
+    diagonal = matrix.diagonal()
+    inverse = np.divide(1, diagonal, out=np.ones_like(diagonal), where=diagonal != 0)
+    return lambda x: inverse * x
+
+
+def _identity(x):
+    return x
+
+
+def _setup(matrix, rhs, x0, precondition):
+    if matrix.shape[0] != matrix.shape[1]:
+        raise ValueError("Expected a square matrix, got shape {}".format(matrix.shape))
+    rhs = np.asarray(rhs, dtype=float)
+    x = np.zeros(matrix.shape[0]) if x0 is None else np.array(x0, dtype=float)
+    norm = np.linalg.norm(rhs) or 1.0
+    return rhs, x, norm, jacobi(matrix) if precondition else _identity
+
+
+def _result(converged, residuals):
+    return {"converged": converged, "iterations": len(residuals) - 1, "residual": residuals[-1], "residuals": residuals}
+
+
+def conjugate_gradient(matrix, rhs, x0=None, tol=1e-8, max_iter=None, precondition=True):
+    """
+    Preconditioned conjugate gradient, for symmetric positive definite matrices only
+    :param tol: stops once the residual norm ||rhs - matrix x|| / ||rhs|| is at most tol
+    :param max_iter: defaults to 10 n
+    :param precondition: use the Jacobi preconditioner
+    :return: returns (x, info) where info has converged, iterations, the final relative residual and the residual of
+    every iteration
+    """
+    rhs, x, norm, preconditioner = _setup(matrix, rhs, x0, precondition)
+    max_iter = 10 * len(x) if max_iter is None else max_iter
+
+    r = rhs - matrix.dot(x)
+    residuals = [np.linalg.norm(r) / norm]
+    z = preconditioner(r)
+    p = z.copy()
+    rz = r.dot(z)
+
+    while residuals[-1] > tol and len(residuals) <= max_iter:
+        q = matrix.dot(p)
+        curvature = p.dot(q)
+        if curvature <= 0:
+            raise np.linalg.LinAlgError("Matrix is not positive definite")
+        alpha = rz / curvature
+        x += alpha * p
+        r -= alpha * q
+        residuals.append(np.linalg.norm(r) / norm)
+
+        z = preconditioner(r)
+        rz, previous = r.dot(z), rz
+        if rz == 0:
+            # The residual vanished or underflowed, which only happens before reaching tol when tol is 0
+            break
+        p = z + (rz / previous) * p
+
+    return x, _result(residuals[-1] <= tol, residuals)
+
+
+def bicgstab(matrix, rhs, x0=None, tol=1e-8, max_iter=None, precondition=True):
+    """
+    Right preconditioned BiCGSTAB for general square matrices, takes the same arguments as conjugate_gradient
+    """
+    rhs, x, norm, preconditioner = _setup(matrix, rhs, x0, precondition)
+    max_iter = 10 * len(x) if max_iter is None else max_iter
+
+    r = rhs - matrix.dot(x)
+    shadow = r.copy()
+    residuals = [np.linalg.norm(r) / norm]
+    rho = alpha = omega = 1.0
+    v = np.zeros_like(x)
+    p = np.zeros_like(x)
+
+    while residuals[-1] > tol and len(residuals) <= max_iter:
+        rho, previous = shadow.dot(r), rho
+        if rho == 0:
+            # Breakdown, the residual is orthogonal to the shadow residual
+            break
+        p = r + (rho / previous) * (alpha / omega) * (p - omega * v)
+        y = preconditioner(p)
+        v = matrix.dot(y)
+        projection = shadow.dot(v)
+        if projection == 0:
+            # Breakdown, alpha would be infinite
+            break
+        alpha = rho / projection
+        s = r - alpha * v
+
+        if np.linalg.norm(s) / norm <= tol:
+            x += alpha * y
+            residuals.append(np.linalg.norm(s) / norm)
+            break
+
+        z = preconditioner(s)
+        t = matrix.dot(z)
+        tt = t.dot(t)
+        if tt == 0:
+            # The matrix maps the preconditioned s to zero, keep the half step
+            x += alpha * y
+            residuals.append(np.linalg.norm(s) / norm)
+            break
+        omega = t.dot(s) / tt
+        x += alpha * y + omega * z
+        r = s - omega * t
+        residuals.append(np.linalg.norm(r) / norm)
+        if omega == 0:
+            break
+
+    return x, _result(residuals[-1] <= tol, residuals)
+
+
+def gmres(matrix, rhs, x0=None, tol=1e-8, max_iter=None, precondition=True, restart=50):
+    """
+    Right preconditioned GMRES restarted every restart iterations, for general square matrices
+
+    Keeps restart + 1 basis vectors of length n. Takes the same arguments as conjugate_gradient.
+    """
+    rhs, x, norm, preconditioner = _setup(matrix, rhs, x0, precondition)
+    n = len(x)
+    max_iter = 10 * n if max_iter is None else max_iter
+    restart = max(1, min(restart, n))
+
+    r = rhs - matrix.dot(x)
+    residuals = [np.linalg.norm(r) / norm]
+
+    while residuals[-1] > tol and len(residuals) <= max_iter:
+        beta = np.linalg.norm(r)
+        basis = np.zeros((restart + 1, n))
+        basis[0] = r / beta
+        hessenberg = np.zeros((restart + 1, restart))
+        cos, sin = np.zeros(restart), np.zeros(restart)
+        g = np.zeros(restart + 1)
+        g[0] = beta
+
+        steps = 0
+        for j in range(restart):
+            # Arnoldi with modified Gram-Schmidt
+            w = matrix.dot(preconditioner(basis[j]))
+            for i in range(j + 1):
+                hessenberg[i, j] = w.dot(basis[i])
+                w -= hessenberg[i, j] * basis[i]
+            hessenberg[j + 1, j] = np.linalg.norm(w)
+            breakdown = hessenberg[j + 1, j] <= 1e-14 * beta
+            if not breakdown:
+                basis[j + 1] = w / hessenberg[j + 1, j]
+
+            # Givens rotations keep the Hessenberg matrix upper triangular and g[j + 1] the residual norm
+            for i in range(j):
+                hessenberg[i, j], hessenberg[i + 1, j] = cos[i] * hessenberg[i, j] + sin[i] * hessenberg[i + 1, j], -sin[i] * hessenberg[i, j] + cos[i] * hessenberg[i + 1, j]
+            radius = np.hypot(hessenberg[j, j], hessenberg[j + 1, j])
+            cos[j], sin[j] = hessenberg[j, j] / radius, hessenberg[j + 1, j] / radius
+            hessenberg[j, j], hessenberg[j + 1, j] = radius, 0
+            g[j], g[j + 1] = cos[j] * g[j], -sin[j] * g[j]
+
+            steps = j + 1
+            residuals.append(abs(g[j + 1]) / norm)
+            if residuals[-1] <= tol or breakdown or len(residuals) > max_iter:
+                break
+
+        y = back_substitution(hessenberg[:steps, :steps], g[:steps])
+        x += preconditioner(basis[:steps].T @ y)
+        r = rhs - matrix.dot(x)
+        # The true residual replaces the estimate of the last step
+        residuals[-1] = np.linalg.norm(r) / norm
+        if breakdown:
+            break
+
+    return x, _result(residuals[-1] <= tol, residuals)
+
+
+METHODS = {
+    "cg": conjugate_gradient,
+    "bicgstab": bicgstab,
+    "gmres": gmres,
+}
+
+
+def solve(matrix, rhs, method=None, **options):
+    """
+    Solves matrix x = rhs iteratively
+    :param method: one of METHODS, by default conjugate gradient for symmetric matrices with a positive diagonal and
+    BiCGSTAB otherwise
+    :param options: passed on to the solver
+    :return: returns (x, info) as the solvers do
+    """
+    if method is None:
+        method = "cg" if matrix.is_symmetric() and (matrix.diagonal() > 0).all() else "bicgstab"
+    x, info = METHODS[method](matrix, rhs, **options)
+    info["method"] = method
+    return x, info
+
+
+class Test_Iterative_Solvers(unittest.TestCase):
+    def setUp(self):
+        # 5-point Poisson on a 20 x 20 grid, symmetric positive definite
+        side = 20
+        grid = np.arange(side * side).reshape(side, side)
+        rows, cols, values = [grid.ravel()], [grid.ravel()], [np.full(side * side, 4.0)]
+        for a, b in ((grid[:, :-1], grid[:, 1:]), (grid[:-1], grid[1:])):
+            rows += [a.ravel(), b.ravel()]
+            cols += [b.ravel(), a.ravel()]
+            values += [np.full(a.size, -1.0)] * 2
+        self.poisson = SparseMatrix.from_triplets(np.concatenate(rows), np.concatenate(cols), np.concatenate(values))
+
+        # 1-D convection-diffusion with upwinding, not symmetric
+        n = 200
+        self.convection = SparseMatrix.from_dense(3 * np.identity(n) - 2 * np.eye(n, k=-1) - 0.5 * np.eye(n, k=1))
+
+    def check(self, matrix, methods):
+        rhs = np.random.default_rng(0).normal(size=matrix.shape[0])
+        expected = np.linalg.solve(matrix.to_dense(), rhs)
+        for method in methods:
+            x, info = solve(matrix, rhs, method, tol=1e-10)
+            self.assertTrue(info["converged"], method)
+            self.assertLessEqual(np.linalg.norm(rhs - matrix.dot(x)) / np.linalg.norm(rhs), 1e-10)
+            np.testing.assert_allclose(x, expected, atol=1e-7)
+
+    def test_poisson(self):
+        self.assertTrue(self.poisson.is_symmetric())
+        self.check(self.poisson, ["cg", "bicgstab", "gmres"])
+        self.assertEqual(solve(self.poisson, np.ones(400))[1]["method"], "cg")
+
+    def test_nonsymmetric(self):
+        self.assertFalse(self.convection.is_symmetric())
+        self.check(self.convection, ["bicgstab", "gmres"])
+        self.assertEqual(solve(self.convection, np.ones(200))[1]["method"], "bicgstab")
+
+    def test_zero_tolerance(self):
+        # Running until the residual underflows must stop cleanly instead of dividing by zero
+        for matrix in (self.poisson, self.convection):
+            for method in ("cg", "bicgstab") if matrix is self.poisson else ("bicgstab",):
+                with np.errstate(divide="raise", invalid="raise"):
+                    x, info = solve(matrix, np.ones(matrix.shape[0]), method, tol=0, max_iter=2000)
+                self.assertTrue(np.isfinite(x).all())
+                self.assertLessEqual(info["residual"], 1e-12)
+
+    def test_bicgstab_breakdown(self):
+        # The shadow residual is orthogonal to the matrix times the first search direction
+        rotation = SparseMatrix.from_dense([[0, 1], [-1, 0]])
+        with np.errstate(divide="raise", invalid="raise"):
+            x, info = bicgstab(rotation, np.array([1.0, 0.0]), precondition=False)
+        self.assertFalse(info["converged"])
+        self.assertTrue(np.isfinite(x).all())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a sparse system given as a triplet file")
+    parser.add_argument("matrix", help="file with lines of \"row column value\"")
+    parser.add_argument("--rhs", help="file with one value per line, defaults to all ones")
+    parser.add_argument("--method", choices=METHODS, default=None)
+    parser.add_argument("--tol", type=float, default=1e-8)
+    parser.add_argument("--max-iter", type=int, default=None)
+    parser.add_argument("--restart", type=int, default=50, help="GMRES restart length")
+    parser.add_argument("--no-precondition", action="store_true")
+    parser.add_argument("--output", help="write the solution here as .npy")
+    args = parser.parse_args()
+
+    matrix = SparseMatrix.from_triplet_file(args.matrix)
+    rhs = np.loadtxt(args.rhs, ndmin=1) if args.rhs else np.ones(matrix.shape[0])
+    options = {"tol": args.tol, "max_iter": args.max_iter, "precondition": not args.no_precondition}
+    if args.method == "gmres":
+        options["restart"] = args.restart
+
+    x, info = solve(matrix, rhs, args.method, **options)
+    print("{} {}x{} with {} non-zeros: {} after {} iterations, relative residual {:.3e}".format(
+        info["method"], matrix.shape[0], matrix.shape[1], matrix.nnz,
+        "converged" if info["converged"] else "not converged", info["iterations"], info["residual"]))
+    if args.output:
+        np.save(args.output, x)
+
+
+if __name__ == '__main__':
+    main()
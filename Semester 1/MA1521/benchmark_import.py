@@ -0,0 +1,59 @@
+"""
+Measures how long a fresh interpreter takes to import vector_solver, against the modules it used to import eagerly
+
+    python benchmark_import.py --repeat 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+CASES = {
+    "vector_solver": "import vector_solver",
+    "vector_solver + Line.is_on": "import vector_solver as vs; vs.Line(vs.v(1, 2, 3), vs.v(4, 5, 6), verbose=False).is_on(vs.v(5, 7, 9))",
+    "vector_solver + symbolic": "import vector_solver as vs; vs.same_direction(vs.v(2, 4, 6), vs.v(1, 2, 3), symbolic=True)",
+    "numpy": "import numpy",
+    "sympy": "import sympy",
+    "vpython": "import vpython",
+}
+
+TIMER = "import time; start = time.perf_counter(); {}; print(time.perf_counter() - start)"
+
+
+def time_case(statement, repeat):
+    """
+    Returns the best time of repeat fresh interpreters running statement, or None if it fails, e.g. not installed
+    """
+    seconds = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", TIMER.format(statement)], cwd=HERE, capture_output=True, text=True)
+        if result.returncode != 0:
+            return None
+        seconds.append(float(result.stdout.strip().splitlines()[-1]))
+    return min(seconds)
+
+
+def run(cases, repeat, quiet=False):
+    results = {}
+    for name in cases:
+        results[name] = time_case(CASES[name], repeat)
+        if not quiet:
+            print("{:<28} {}".format(name, "not available" if results[name] is None else "{:.4f}s".format(results[name])), file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the import time of vector_solver")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.cases, args.repeat, args.quiet), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,151 @@
 #!/usr/bin/env python
-from vpython import vector as v
-from vpython import *
 from typing import Union, Type
-import sympy as sym
 from fractions import Fraction
+from math import sqrt, acos, pi
+from contextlib import redirect_stdout
+import io
+import os
+import pickle
+import subprocess
+import sys
+import unittest
+import importlib.util
+import numpy as np
+
+# sympy and vpython are slow to import, vpython also tries to open a display, so they are only imported by the
+# symbolic paths and Vector.to_vpython
+
+
+def _sympy():
+    import sympy
+    return sympy
+
+
+class Vector:
+    """
+    Immutable 3-vector with the parts of the vpython vector API this module uses
+
+    Components keep their type, so Vectors of ints or Fractions stay exact.
+    """
+    __slots__ = ("x", "y", "z")
+    # Make NumPy scalars and arrays defer to Vector.__rmul__ instead of broadcasting
+    __array_ufunc__ = None
+
+    def __init__(self, x=0, y=0, z=0) -> None:
+        object.__setattr__(self, "x", x)
+        object.__setattr__(self, "y", y)
+        object.__setattr__(self, "z", z)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Vector is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Vector is immutable")
+
+    def __reduce__(self):
+        return (Vector, (self.x, self.y, self.z))
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z))
+
+    def __add__(self, other: "Vector") -> "Vector":
+        return Vector(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other: "Vector") -> "Vector":
+        return Vector(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __mul__(self, k) -> "Vector":
+        return Vector(self.x * k, self.y * k, self.z * k)
+
+    def __rmul__(self, k) -> "Vector":
+        return Vector(k * self.x, k * self.y, k * self.z)
+
+    def __truediv__(self, k) -> "Vector":
+        return Vector(self.x / k, self.y / k, self.z / k)
+
+    def __neg__(self) -> "Vector":
+        return Vector(-self.x, -self.y, -self.z)
+
+    def __pos__(self) -> "Vector":
+        return self
+
+    def __eq__(self, other) -> bool:
+        try:
+            return self.x == other.x and self.y == other.y and self.z == other.z
+        except AttributeError:
+            return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((self.x, self.y, self.z))
+
+    @property
+    def mag(self):
+        return sqrt(self.mag2)
+
+    @property
+    def mag2(self):
+        return self.x * self.x + self.y * self.y + self.z * self.z
+
+    @property
+    def hat(self) -> "Vector":
+        return self.norm()
+
+    def dot(self, other: "Vector"):
+        return self.x * other.x + self.y * other.y + self.z * other.z
+
+    def cross(self, other: "Vector") -> "Vector":
+        return Vector(self.y * other.z - self.z * other.y, self.z * other.x - self.x * other.z, self.x * other.y - self.y * other.x)
+
+    def norm(self) -> "Vector":
+        magnitude = self.mag
+        return self / magnitude if magnitude else Vector(0, 0, 0)
+
+    def equals(self, other: "Vector") -> bool:
+        return self == other
+
+    def diff_angle(self, other: "Vector") -> float:
+        return acos(max(-1.0, min(1.0, self.dot(other) / (self.mag * other.mag))))
+
+    def proj(self, other: "Vector") -> "Vector":
+        return other * (self.dot(other) / other.mag2)
+
+    def to_vpython(self):
+        from vpython import vector as vpython_vector
+        return vpython_vector(self.x, self.y, self.z)
+
+    def __repr__(self) -> str:
+        return "<{}, {}, {}>".format(self.x, self.y, self.z)
+
+    __str__ = __repr__
+
+
+vector = v = Vector
+
+def mag(A: vector):
+    return sqrt(A.x * A.x + A.y * A.y + A.z * A.z)
+
+def dot(A: vector, B: vector):
+    return A.x * B.x + A.y * B.y + A.z * B.z
+
+def cross(A: vector, B: vector) -> vector:
+    return Vector(A.y * B.z - A.z * B.y, A.z * B.x - A.x * B.z, A.x * B.y - A.y * B.x)
+
+def norm(A: vector) -> vector:
+    magnitude = mag(A)
+    return Vector(A.x / magnitude, A.y / magnitude, A.z / magnitude) if magnitude else Vector(0, 0, 0)
+
+def diff_angle(A: vector, B: vector) -> float:
+    return acos(max(-1.0, min(1.0, dot(A, B) / (mag(A) * mag(B)))))
+
+def proj(A: vector, B: vector) -> vector:
+    k = dot(A, B) / dot(B, B)
+    return Vector(k * B.x, k * B.y, k * B.z)
 
 def man():
     print("""
     origin = v(0,0,0)
 
-    To create a vector:
+    To create a vector (vpython vectors work as well, A.to_vpython() converts for drawing):
     A = vector(0,0,0)
     B = v(1,1,1)
 
@@ -37,10 +173,51 @@ def man():
     Plane.shortest_distance(position_v): Calculate the shortest distance from point to Plane
     Plane.line_intersection(line): Calculate the point of intersection between Line and Plane
     Plane.plane_intersection(plane): Calculate the Line of intersection between both Planes
+
+    LineArray(positions, directions) / PlaneArray(normals, d): N Lines / Planes as (N,3) arrays, with the methods above
+    vectorised over all N x M pairs, or over paired rows with pairwise=True. LineArray.from_lines(lines) and
+    PlaneArray.from_planes(planes) convert from Line / Plane objects, to_lines() and to_planes() back.
     """)
 
 origin = v(0,0,0)
 
+# Relative tolerance of the numeric predicates, e.g. a point is on a Line if its distance is within TOLERANCE of the
+# size of the vectors involved
+TOLERANCE = 1e-9
+
+def _components(u, exact: bool = False) -> tuple:
+    if exact:
+        return (Fraction(u.x), Fraction(u.y), Fraction(u.z))
+    return (u.x, u.y, u.z)
+
+def _sub(a: tuple, b: tuple) -> tuple:
+    return (a[0] - b[0], a[1] - b[1], a[2] - b[2])
+
+def _dot(a: tuple, b: tuple):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+def _cross(a: tuple, b: tuple) -> tuple:
+    return (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0])
+
+def _point(position: tuple, t, direction: tuple) -> vector:
+    return vector(position[0] + t * direction[0], position[1] + t * direction[1], position[2] + t * direction[2])
+
+def _is_zero(a: tuple, scale_square, tol: float, exact: bool) -> bool:
+    """
+    Checks if a is the zero vector, exactly or within tol times the square root of scale_square
+    """
+    if exact:
+        return a == (0, 0, 0)
+    return _dot(a, a) <= tol * tol * scale_square
+
+def _parallel(a: tuple, b: tuple, tol: float, exact: bool) -> bool:
+    """
+    Checks if a is a scalar multiple of b, |a x b| is compared against |a||b|
+    """
+    if _is_zero(b, 0, tol, exact):
+        return _is_zero(a, 0, tol, exact)
+    return _is_zero(_cross(a, b), _dot(a, a) * _dot(b, b), tol, exact)
+
 def midpoint(position_v1: vector, position_v2:vector) -> vector:
     """
     Calculates the position vector of the midpoint of the given 2 points
@@ -65,15 +242,21 @@ def unit(direction_v: vector) -> vector:
  
     return norm(direction_v)
 
-def same_direction(direction_v1: vector,direction_v2:vector) -> bool:
+def same_direction(direction_v1: vector,direction_v2:vector, tol: float = TOLERANCE, exact: bool = False, symbolic: bool = False) -> bool:
     """
     Checks if the two given vectors are in the scalar multiples of each other
 
     :param direction_v1: first vector
     :param direction_v2: second vector
+    :param tol: relative tolerance of the check
+    :param exact: compare exactly with Fractions, for rational components
+    :param symbolic: solve with sympy and print the solution, slow
     :return: returns True if vectors are in the same direction
     """
+    if not symbolic:
+        return _parallel(_components(direction_v1, exact), _components(direction_v2, exact), tol, exact)
 
+    sym = _sympy()
     k = sym.symbols('k')
     x_eqn = sym.Eq(direction_v1.x, direction_v2.x * k)
     y_eqn = sym.Eq(direction_v1.y, direction_v2.y * k)
@@ -84,18 +267,20 @@ def same_direction(direction_v1: vector,direction_v2:vector) -> bool:
     return result != []
 
 class Line:
-    def __init__(self, position_v: vector, direction_v: vector) -> None:
+    def __init__(self, position_v: vector, direction_v: vector, verbose: bool = True) -> None:
         """
         Construct a new vector equation of a Line.
 
         :param position_v: a position vector of a point on the line
         :param direction_v: the direction vector
+        :param verbose: print the equation of the Line
         :return: returns nothing
         """
 
         self.position_v = position_v
         self.direction_v = direction_v
-        print(self.__str__())
+        if verbose:
+            print(self.__str__())
 
     def point(self, t: Union[int, float]) -> vector:
         """
@@ -107,13 +292,21 @@ class Line:
 
         return self.position_v + t * self.direction_v
     
-    def is_on(self, position_v: vector) -> bool:
+    def is_on(self, position_v: vector, tol: float = TOLERANCE, exact: bool = False, symbolic: bool = False) -> bool:
         """
         Checks if a given point lies on this Line.
 
         :param position_v: the position vector of the point to be checked
+        :param tol: relative tolerance of the check
+        :param exact: compare exactly with Fractions, for rational components
+        :param symbolic: solve with sympy and print the solution, slow
         :return: returns True if the given point lies on this Line, False otherwise
         """
+        if not symbolic:
+            offset = _sub(_components(position_v, exact), _components(self.position_v, exact))
+            return _parallel(offset, _components(self.direction_v, exact), tol, exact)
+
+        sym = _sympy()
         t = sym.symbols("t")
         eqn_x = sym.Eq(self.direction_v.x * t, position_v.x - self.position_v.x)
         eqn_y = sym.Eq(self.direction_v.y * t, position_v.y - self.position_v.y)
@@ -128,7 +321,7 @@ class Line:
         #     (position_v.y - self.position_v.y) / self.direction_v.y == \
         #     (position_v.z - self.position_v.z) / self.direction_v.z 
     
-    def shortest_distance(self, position_v: vector) -> Union[sym.core.mul.Mul, float] :
+    def shortest_distance(self, position_v: vector) -> float:
         """
         Calculate the shortest/perpendicular distance of a given point to this Line. 
 
@@ -144,14 +337,21 @@ class Line:
 
         return mag(cross(position_v - self.position_v, self.direction_v)/mag(self.direction_v))
     
-    def line_intersection(self, line: Type["Line"]) -> vector:
+    def line_intersection(self, line: Type["Line"], tol: float = TOLERANCE, exact: bool = False, symbolic: bool = False) -> vector:
         """
         Calculates the position vector of the point at which the given Line and this Line intersects.
 
         :param line: the given Line to check with
+        :param tol: relative tolerance of the parallel and coplanar checks
+        :param exact: compute exactly with Fractions, for rational components
+        :param symbolic: solve with sympy and print the solution, slow
         :return: returns the position vector of the intersection point
         """
+        if not symbolic:
+            t = self._intersection_parameter(line, tol, exact)
+            return _point(_components(self.position_v, exact), t, _components(self.direction_v, exact))
 
+        sym = _sympy()
         t,s = sym.symbols('t, s')
         x_eqn = sym.Eq(self.position_v.x + t * self.direction_v.x, line.position_v.x + s * line.direction_v.x)
         y_eqn = sym.Eq(self.position_v.y + t * self.direction_v.y, line.position_v.y + s * line.direction_v.y)
@@ -164,15 +364,40 @@ class Line:
 
         return self.position_v + float(result[t]) * self.direction_v
 
-    def is_same_line(self, line: Type["Line"]) -> bool:
+    def _intersection_parameter(self, line: Type["Line"], tol: float, exact: bool):
+        """
+        Returns t of the intersection point, from (w x d2) . n = t |n|^2 where w joins the two position vectors and
+        n = d1 x d2
+        """
+        d1, d2 = _components(self.direction_v, exact), _components(line.direction_v, exact)
+        w = _sub(_components(line.position_v, exact), _components(self.position_v, exact))
+        n = _cross(d1, d2)
+        n_square = _dot(n, n)
+
+        if _is_zero(n, _dot(d1, d1) * _dot(d2, d2), tol, exact):
+            if _parallel(w, d1, tol, exact):
+                raise AssertionError("Both Lines are the same Line!")
+            raise AssertionError("Both Lines do not intersect!")
+        # Skew lines are not in a common plane
+        if not _is_zero((_dot(w, n), 0, 0), _dot(w, w) * n_square, tol, exact):
+            raise AssertionError("Both Lines do not intersect!")
+
+        return _dot(_cross(w, d2), n) / n_square
+
+    def is_same_line(self, line: Type["Line"], tol: float = TOLERANCE, exact: bool = False, symbolic: bool = False) -> bool:
         """
         Checks if the given Line is equivalent to this Line
 
         :param line: the given Line to check with
+        :param tol: relative tolerance of the check
+        :param exact: compare exactly with Fractions, for rational components
+        :param symbolic: solve with sympy and print the solutions, slow
         :return: returns True if both Lines are equivalent
         """
+        if not symbolic:
+            return same_direction(self.direction_v, line.direction_v, tol, exact) and self.is_on(line.position_v, tol, exact)
 
-        return same_direction(self.direction_v, line.direction_v) and self.is_on(line.position_v) and line.is_on(self.position_v)
+        return same_direction(self.direction_v, line.direction_v, symbolic=True) and self.is_on(line.position_v, symbolic=True) and line.is_on(self.position_v, symbolic=True)
 
     def __str__(self) -> str:
         """
@@ -207,7 +432,7 @@ class Line:
 
 
 class Plane:
-    def __init__(self, position_v: vector, normal_v: vector, d: Union[int, float] = 0, use_d: bool = False) -> None:
+    def __init__(self, position_v: vector, normal_v: vector, d: Union[int, float] = 0, use_d: bool = False, verbose: bool = True) -> None:
         """
         Construct a new vector equation of a Plane.
 
@@ -215,6 +440,7 @@ class Plane:
         :param normal_v: the vector normal to the plane
         :param d: the d value of ax + by + cz = d
         :param use_d: True if you are using the d parameter
+        :param verbose: print the equation of the Plane
         :return: returns nothing
         """
 
@@ -225,7 +451,8 @@ class Plane:
         else:
             self.d = dot(self.normal_v, position_v)
         
-        print(self.__str__())
+        if verbose:
+            print(self.__str__())
 
     def is_on(self, position_v: vector) -> bool:
         """
@@ -253,14 +480,27 @@ class Plane:
 
         return distance
     
-    def line_intersection(self, line: Line) -> vector:
+    def line_intersection(self, line: Line, tol: float = TOLERANCE, exact: bool = False, symbolic: bool = False) -> vector:
         """
         Calculate the intersection point of a given Line intersects with this Plane
 
         :param line: the given Line to check with
+        :param tol: relative tolerance of the parallel check
+        :param exact: compute exactly with Fractions, for rational components
+        :param symbolic: solve with sympy and print the solution, slow
         :return: returns the position vector of the intersection point
         """
+        if not symbolic:
+            normal, direction = _components(self.normal_v, exact), _components(line.direction_v, exact)
+            position = _components(line.position_v, exact)
+            # n . (p + t d) = d_plane, so t = (d_plane - n . p) / (n . d)
+            denominator = _dot(normal, direction)
+            if _is_zero((denominator, 0, 0), _dot(normal, normal) * _dot(direction, direction), tol, exact):
+                raise AssertionError("The Line does not intersect this Plane")
+            d = Fraction(self.d) if exact else self.d
+            return _point(position, (d - _dot(normal, position)) / denominator, direction)
         
+        sym = _sympy()
         t = sym.symbols('t')
         x = (line.position_v.x + t * line.direction_v.x) * self.normal_v.x
         y = (line.position_v.y + t * line.direction_v.y) * self.normal_v.y
@@ -284,6 +524,7 @@ class Plane:
         :return: returns the Line at the intersection
         """
         
+        sym = _sympy()
         x, y, z = sym.symbols('x, y, z')
 
         p1_eqn = self.normal_v.x * x + self.normal_v.y * y + self.normal_v.z * z - self.d
@@ -334,6 +575,535 @@ class Plane:
         return "<Plane normal_v={} d={} >".format(repr(self.normal_v), self.d)
 
 
+def _as_points(points) -> np.ndarray:
+    points = np.asarray(points, dtype=float)
+    if points.ndim == 1:
+        points = points[np.newaxis]
+    if points.shape[-1] != 3:
+        raise ValueError("Expected points of shape (M, 3), got {}".format(points.shape))
+    return points
+
+def _pairs(a: np.ndarray, b: np.ndarray, pairwise: bool) -> tuple:
+    """
+    Lines a up against b, row by row if pairwise, or every row of a against every row of b as (N, M) otherwise
+    """
+    if pairwise:
+        if len(a) != len(b):
+            raise ValueError("Pairwise operations need the same number of rows, got {} and {}".format(len(a), len(b)))
+        return a, b
+    return a[:, np.newaxis], b[np.newaxis]
+
+def _row_dot(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.einsum("...i,...i->...", a, b)
+
+class LineArray:
+    def __init__(self, positions: np.ndarray, directions: np.ndarray) -> None:
+        """
+        N Lines, r = positions[i] + t directions[i]
+
+        :param positions: (N, 3) position vectors of a point on every Line
+        :param directions: (N, 3) direction vectors
+        :return: returns nothing
+        """
+
+        self.positions = _as_points(positions)
+        self.directions = _as_points(directions)
+        if self.positions.shape != self.directions.shape:
+            raise ValueError("positions and directions must have the same shape")
+
+    @classmethod
+    def from_lines(cls, lines: list) -> "LineArray":
+        return cls([_components(line.position_v) for line in lines], [_components(line.direction_v) for line in lines])
+
+    def to_lines(self) -> list:
+        return [Line(vector(*position), vector(*direction), verbose=False) for position, direction in zip(self.positions.tolist(), self.directions.tolist())]
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def point(self, t) -> np.ndarray:
+        """
+        Calculate points on the Lines.
+
+        :param t: a scalar for every Line, (N,) for one point per Line or (N, K) for K points per Line
+        :return: returns the (N, 3) or (N, K, 3) position vectors
+        """
+
+        t = np.asarray(t, dtype=float)[..., np.newaxis]
+        if t.ndim == 3:
+            return self.positions[:, np.newaxis] + t * self.directions[:, np.newaxis]
+        return self.positions + t * self.directions
+
+    # Lines are handled in chunks so that the offsets to M points, 3 (chunk, M) arrays, have at most about this many numbers
+    chunk_size = 1 << 20
+
+    def _offsets(self, points: np.ndarray, pairwise: bool, reduce) -> np.ndarray:
+        """
+        Returns reduce(|w x d|^2, |w|^2, |d|^2) for the offsets w from the Lines' positions to the points
+
+        Like Line.is_on this uses the cross product, |w|^2 - (w . d)^2 / |d|^2 loses all precision for points on or
+        close to a Line far from the origin.
+        """
+        d_square = _row_dot(self.directions, self.directions)
+        if pairwise:
+            w = points - self.positions
+            c = np.cross(w, self.directions)
+            return reduce(_row_dot(c, c), _row_dot(w, w), d_square)
+
+        result = None
+        rows = max(1, self.chunk_size // max(3 * len(points), 1))
+        for start in range(0, len(self), rows):
+            # One (chunk, M) array per component is cheaper than np.cross on (chunk, M, 3)
+            wx, wy, wz = (points[:, i] - self.positions[start:start + rows, i, np.newaxis] for i in range(3))
+            dx, dy, dz = (self.directions[start:start + rows, i, np.newaxis] for i in range(3))
+            c_square = np.square(wy * dz - wz * dy) + np.square(wz * dx - wx * dz) + np.square(wx * dy - wy * dx)
+            chunk = reduce(c_square, wx * wx + wy * wy + wz * wz, d_square[start:start + rows, np.newaxis])
+            if result is None:
+                result = np.empty((len(self), len(points)), dtype=chunk.dtype)
+            result[start:start + rows] = chunk
+        if result is None:
+            empty = np.zeros((0, len(points)))
+            result = reduce(empty, empty, empty)
+        return result
+
+    def is_on(self, points, tol: float = TOLERANCE, pairwise: bool = False) -> np.ndarray:
+        """
+        Checks which points lie on which Lines
+
+        :param points: (M, 3) position vectors
+        :param tol: relative tolerance of the check, |w x d| against |w||d| as in Line.is_on
+        :param pairwise: check point i against Line i only
+        :return: returns an (N, M) mask, or (N,) if pairwise
+        """
+        # A Line without a direction is only its position
+        return self._offsets(_as_points(points), pairwise, lambda c, w, d: np.where(d > 0, c <= tol * tol * w * d, w == 0))
+
+    def shortest_distance(self, points, pairwise: bool = False) -> np.ndarray:
+        """
+        Calculate the shortest distances from points to Lines
+
+        :param points: (M, 3) position vectors
+        :param pairwise: measure point i against Line i only
+        :return: returns the (N, M) distances, or (N,) if pairwise
+        """
+        return self._offsets(_as_points(points), pairwise, lambda c, w, d: np.sqrt(np.divide(c, d, out=w.copy(), where=d > 0)))
+
+    def line_intersection(self, lines: "LineArray", tol: float = TOLERANCE, pairwise: bool = False) -> tuple:
+        """
+        Calculate the intersection points of these Lines with the given Lines
+
+        :param lines: the given Lines
+        :param tol: relative tolerance of the parallel and coplanar checks
+        :param pairwise: intersect Line i with given Line i only
+        :return: returns (points, mask), (N, M, 3) intersection points, NaN where the Lines do not meet in one point,
+        and the (N, M) mask of pairs that do, without the leading M if pairwise
+        """
+        a1, a2 = _pairs(self.positions, lines.positions, pairwise)
+        d1, d2 = _pairs(self.directions, lines.directions, pairwise)
+        w = a2 - a1
+        n = np.cross(d1, d2)
+        n_square = _row_dot(n, n)
+
+        parallel = n_square <= tol * tol * _row_dot(d1, d1) * _row_dot(d2, d2)
+        skew = _row_dot(w, n) ** 2 > tol * tol * _row_dot(w, w) * n_square
+        mask = ~parallel & ~skew
+        t = np.divide(_row_dot(np.cross(w, d2), n), n_square, out=np.full(mask.shape, np.nan), where=mask)
+        return a1 + t[..., np.newaxis] * d1, mask
+
+    def plane_intersection(self, planes: "PlaneArray", tol: float = TOLERANCE, pairwise: bool = False) -> tuple:
+        """
+        Calculate the points where these Lines cross the given Planes, see PlaneArray.line_intersection
+
+        :return: returns (points, mask) of shape (N Lines, M Planes, 3) and (N, M)
+        """
+        points, mask = planes.line_intersection(self, tol, pairwise)
+        return (points, mask) if pairwise else (points.swapaxes(0, 1), mask.T)
+
+    def __repr__(self) -> str:
+        return "<LineArray of {} Lines>".format(len(self))
+
+
+class PlaneArray:
+    def __init__(self, normals: np.ndarray, d: np.ndarray) -> None:
+        """
+        N Planes, r . normals[i] = d[i]
+
+        :param normals: (N, 3) vectors normal to the planes
+        :param d: (N,) d values of ax + by + cz = d
+        :return: returns nothing
+        """
+
+        self.normals = _as_points(normals)
+        self.d = np.broadcast_to(np.asarray(d, dtype=float), len(self.normals)).copy()
+
+    @classmethod
+    def from_points(cls, positions: np.ndarray, normals: np.ndarray) -> "PlaneArray":
+        """
+        Construct the Planes through the given (N, 3) points
+        """
+        normals = _as_points(normals)
+        return cls(normals, _row_dot(_as_points(positions), normals))
+
+    @classmethod
+    def from_planes(cls, planes: list) -> "PlaneArray":
+        return cls([_components(plane.normal_v) for plane in planes], [plane.d for plane in planes])
+
+    def to_planes(self) -> list:
+        return [Plane(origin, vector(*normal), d, use_d=True, verbose=False) for normal, d in zip(self.normals.tolist(), self.d.tolist())]
+
+    def __len__(self) -> int:
+        return len(self.normals)
+
+    def _signed_distances(self, points: np.ndarray, pairwise: bool) -> np.ndarray:
+        """
+        Returns r . n - d for every point, not divided by |n|
+        """
+        if pairwise:
+            return _row_dot(points, self.normals) - self.d
+        distances = self.normals @ points.T
+        distances -= self.d[:, np.newaxis]
+        return distances
+
+    def is_on(self, points, tol: float = TOLERANCE, pairwise: bool = False) -> np.ndarray:
+        """
+        Checks which points lie on which Planes
+
+        :param points: (M, 3) position vectors
+        :param tol: relative tolerance of the check, against |r||n| + |d|
+        :param pairwise: check point i against Plane i only
+        :return: returns an (N, M) mask, or (N,) if pairwise
+        """
+        points = _as_points(points)
+        norms = np.sqrt(_row_dot(self.normals, self.normals))
+        point_norms = np.sqrt(_row_dot(points, points))
+        # Work in place, for many points the (N, M) temporaries dominate the memory
+        if pairwise:
+            scale = norms * point_norms + np.abs(self.d)
+        else:
+            scale = np.multiply.outer(norms, point_norms)
+            scale += np.abs(self.d)[:, np.newaxis]
+        scale *= tol
+        distances = self._signed_distances(points, pairwise)
+        return np.abs(distances, out=distances) <= scale
+
+    def shortest_distance(self, points, pairwise: bool = False) -> np.ndarray:
+        """
+        Calculate the shortest distances from points to Planes
+
+        :param points: (M, 3) position vectors
+        :param pairwise: measure point i against Plane i only
+        :return: returns the (N, M) distances, or (N,) if pairwise
+        """
+        norms = np.sqrt(_row_dot(self.normals, self.normals))
+        distances = self._signed_distances(_as_points(points), pairwise)
+        np.abs(distances, out=distances)
+        distances /= norms if pairwise else norms[:, np.newaxis]
+        return distances
+
+    def line_intersection(self, lines: LineArray, tol: float = TOLERANCE, pairwise: bool = False) -> tuple:
+        """
+        Calculate the points where the given Lines cross these Planes
+
+        :param lines: the given Lines
+        :param tol: relative tolerance of the parallel check
+        :param pairwise: intersect Plane i with Line i only
+        :return: returns (points, mask), (N Planes, M Lines, 3) intersection points, NaN for Lines parallel to a Plane,
+        and the (N, M) mask of pairs that meet in one point, without the leading M if pairwise
+        """
+        normals, directions = _pairs(self.normals, lines.directions, pairwise)
+        positions = lines.positions if pairwise else lines.positions[np.newaxis]
+        d = self.d if pairwise else self.d[:, np.newaxis]
+
+        # n . (p + t d) = d_plane, so t = (d_plane - n . p) / (n . d)
+        denominator = _row_dot(normals, directions)
+        mask = denominator ** 2 > tol * tol * _row_dot(normals, normals) * _row_dot(directions, directions)
+        t = np.divide(d - _row_dot(normals, positions), denominator, out=np.full(mask.shape, np.nan), where=mask)
+        return positions + t[..., np.newaxis] * directions, mask
+
+    def plane_intersection(self, planes: "PlaneArray", tol: float = TOLERANCE, pairwise: bool = False) -> tuple:
+        """
+        Calculate the Lines of intersection of these Planes with the given Planes
+
+        The direction is n1 x n2 and the point (d1 (n2 x u) + d2 (u x n1)) / |u|^2 with u = n1 x n2, the point of the
+        Line closest to the origin.
+        :param planes: the given Planes
+        :param tol: relative tolerance of the parallel check
+        :param pairwise: intersect Plane i with given Plane i only
+        :return: returns (lines, mask), a LineArray of the N x M intersections flattened row by row, NaN for parallel
+        Planes, and the (N, M) mask of pairs that do meet in a Line, without M if pairwise
+        """
+        n1, n2 = _pairs(self.normals, planes.normals, pairwise)
+        d1, d2 = _pairs(self.d, planes.d, pairwise)
+        u = np.cross(n1, n2)
+        u_square = _row_dot(u, u)
+        mask = u_square > tol * tol * _row_dot(n1, n1) * _row_dot(n2, n2)
+
+        numerator = d1[..., np.newaxis] * np.cross(n2, u) + d2[..., np.newaxis] * np.cross(u, n1)
+        positions = np.divide(numerator, u_square[..., np.newaxis], out=np.full(numerator.shape, np.nan), where=mask[..., np.newaxis])
+        directions = np.where(mask[..., np.newaxis], u, np.nan)
+        return LineArray(positions.reshape(-1, 3), directions.reshape(-1, 3)), mask
+
+    def __repr__(self) -> str:
+        return "<PlaneArray of {} Planes>".format(len(self))
+
+
+class Test_Arrays(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.rng = rng
+        # Lines far from the origin, where |w|^2 - (w . d)^2 / |d|^2 cancels badly
+        self.positions = np.concatenate([rng.normal(size=(4, 3)), 1e5 + rng.normal(size=(4, 3))])
+        self.directions = rng.normal(size=(8, 3))
+        self.lines = LineArray(self.positions, self.directions)
+
+        # t away from 0, a point rounded to 1e5 * eps is not on a Line within tol of a tiny |w|
+        on = self.positions + rng.uniform(0.5, 2, (8, 1)) * self.directions
+        off = on + np.cross(self.directions, rng.normal(size=(8, 3))) * 1e-3
+        self.points = np.concatenate([on, off, self.positions, [[0, 0, 0]], 1e5 + rng.normal(size=(3, 3))])
+
+    def quietly(self, function, *args):
+        # The Line and Plane methods print their working
+        with redirect_stdout(io.StringIO()):
+            return function(*args)
+
+    def test_line_is_on(self):
+        expected = [[line.is_on(vector(*point)) for point in self.points.tolist()] for line in self.lines.to_lines()]
+        mask = self.lines.is_on(self.points)
+        np.testing.assert_array_equal(mask, expected)
+        # Every point built on a Line is found on it, even at 1e5
+        self.assertTrue(mask[np.arange(8), np.arange(8)].all())
+        self.assertFalse(mask[np.arange(8), np.arange(8, 16)].any())
+        np.testing.assert_array_equal(self.lines.is_on(self.points[:8], pairwise=True), True)
+        exact = LineArray([[100000, 100001, 99999]], [[1, 2, 3]])
+        np.testing.assert_array_equal(exact.is_on([[100007, 100015, 100020], [100007, 100015, 100021]]), [[True, False]])
+
+        # The chunked and pairwise paths agree with the whole
+        self.lines.chunk_size = 3 * len(self.points) * 3
+        np.testing.assert_array_equal(self.lines.is_on(self.points), mask)
+        np.testing.assert_array_equal(self.lines.is_on(self.points[8:16], pairwise=True), mask[np.arange(8), np.arange(8, 16)])
+
+    def test_line_shortest_distance(self):
+        expected = [[self.quietly(line.shortest_distance, vector(*point)) for point in self.points.tolist()] for line in self.lines.to_lines()]
+        distances = self.lines.shortest_distance(self.points)
+        np.testing.assert_allclose(distances, expected, rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose(self.lines.shortest_distance(self.points[:8], pairwise=True), 0, atol=1e-9)
+        np.testing.assert_allclose(self.lines.shortest_distance(self.points[8:16], pairwise=True), distances[np.arange(8), np.arange(8, 16)])
+
+    def test_line_without_direction(self):
+        lines = LineArray([[1, 2, 3]], [[0, 0, 0]])
+        np.testing.assert_array_equal(lines.is_on([[1, 2, 3], [1, 2, 4]]), [[True, False]])
+        np.testing.assert_array_equal(lines.shortest_distance([[1, 2, 3], [1, 2, 5]]), [[0, 2]])
+
+    def test_plane_is_on_and_distance(self):
+        # Integer normals and points keep Plane.is_on, an exact comparison, meaningful
+        normals = self.rng.integers(-5, 6, (6, 3))
+        normals[0] = [0, 0, 1]
+        planes = PlaneArray.from_points(self.rng.integers(-50, 50, (6, 3)), normals)
+        points = np.concatenate([self.rng.integers(-50, 50, (20, 3)), [[0, 0, planes.d[0]]]])
+
+        objects = planes.to_planes()
+        expected = [[plane.is_on(vector(*point)) for point in points.tolist()] for plane in objects]
+        np.testing.assert_array_equal(planes.is_on(points), expected)
+        self.assertTrue(planes.is_on(points)[0, -1])
+
+        expected = [[self.quietly(plane.shortest_distance, vector(*point)) for point in points.tolist()] for plane in objects]
+        np.testing.assert_allclose(planes.shortest_distance(points), expected)
+        np.testing.assert_allclose(planes.shortest_distance(points[:6], pairwise=True), np.diagonal(expected)[:6])
+
+    def test_plane_intersections(self):
+        planes = PlaneArray(self.rng.normal(size=(5, 3)), self.rng.normal(size=5) * 1e5)
+        points, mask = planes.line_intersection(self.lines)
+        self.assertTrue(mask.all())
+        for i, plane in enumerate(planes.to_planes()):
+            for j, line in enumerate(self.lines.to_lines()):
+                np.testing.assert_allclose(points[i, j], list(plane.line_intersection(line)), rtol=1e-9)
+            # The points lie on both the Plane and the Lines
+            self.assertTrue(self.lines.is_on(points[i], pairwise=True).all())
+            self.assertTrue(planes.is_on(points[i])[i].all())
+
+        others = PlaneArray([[0, 0, 1], [0, 0, 2], [1, 0, 0]], [0, 1, 1e5])
+        lines, mask = planes.plane_intersection(others)
+        self.assertTrue(mask.all())
+        points = lines.point(np.ones(15)).reshape(5, 3, 3)
+        on_planes, on_others = planes.is_on(points.reshape(-1, 3)).reshape(5, 5, 3), others.is_on(points.reshape(-1, 3)).reshape(3, 5, 3)
+        self.assertTrue(on_planes[np.arange(5), np.arange(5)].all())
+        self.assertTrue(on_others[np.arange(3), :, np.arange(3)].all())
+
+        lines, mask = others.plane_intersection(others)
+        np.testing.assert_array_equal(mask, [[False, False, True], [False, False, True], [True, True, False]])
+        self.assertTrue(np.isnan(lines.positions.reshape(3, 3, 3)[~mask]).all())
+
+
+class Test_Geometry(unittest.TestCase):
+    def setUp(self):
+        self.l1 = Line(v(1,2,3), v(4,5,6), verbose=False)
+        self.l2 = Line(v(1,2,4), v(4,5,7), verbose=False)
+        self.plane = Plane(v(0,0,0), v(2,1,-4), 4, use_d=True, verbose=False)
+        self.line = Line(v(0,2,0), v(1,3,1), verbose=False)
+
+    def quietly(self, function, *args, **kwargs):
+        # The symbolic paths print their solutions
+        with redirect_stdout(io.StringIO()):
+            return function(*args, **kwargs)
+
+    def assertExact(self, u):
+        for component in u:
+            self.assertIsInstance(component, (int, Fraction))
+
+    def test_same_direction(self):
+        cases = [((2,4,6), (1,2,3), True), ((1,2,3), (-3,-6,-9), True), ((1,2,3), (1,2,4), False), ((1,0,0), (0,1,0), False)]
+        for a, b, expected in cases:
+            self.assertEqual(same_direction(v(*a), v(*b)), expected)
+            self.assertEqual(same_direction(v(*a), v(*b), exact=True), expected)
+            self.assertEqual(self.quietly(same_direction, v(*a), v(*b), symbolic=True), expected)
+
+    def test_line_is_on(self):
+        for point, expected in [((5,7,9), True), ((21,27,33), True), ((-3,-3,-3), True), ((1,2,4), False)]:
+            self.assertEqual(self.l1.is_on(v(*point)), expected)
+            self.assertEqual(self.l1.is_on(v(*point), exact=True), expected)
+            self.assertEqual(self.quietly(self.l1.is_on, v(*point), symbolic=True), expected)
+
+    def test_line_intersection(self):
+        self.assertEqual(self.l1.line_intersection(self.l2), v(-3,-3,-3))
+        self.assertEqual(self.quietly(self.l1.line_intersection, self.l2, symbolic=True), v(-3,-3,-3))
+        point = self.l1.line_intersection(self.l2, exact=True)
+        self.assertEqual(point, v(-3,-3,-3))
+        self.assertExact(point)
+
+        # A third is not a float, the exact path keeps it so
+        point = Line(v(Fraction(1, 3),0,0), v(1,1,0), verbose=False).line_intersection(Line(v(0,0,0), v(0,1,0), verbose=False), exact=True)
+        self.assertEqual(point, v(0, Fraction(-1, 3), 0))
+        self.assertExact(point)
+
+    def test_line_intersection_errors(self):
+        parallel = Line(v(0,0,0), v(8,10,12), verbose=False)
+        same = Line(v(5,7,9), v(-8,-10,-12), verbose=False)
+        skew = Line(v(0,0,1), v(0,1,0), verbose=False)
+        x_axis = Line(v(0,0,0), v(1,0,0), verbose=False)
+        for exact in [False, True]:
+            with self.assertRaisesRegex(AssertionError, "do not intersect"):
+                self.l1.line_intersection(parallel, exact=exact)
+            with self.assertRaisesRegex(AssertionError, "same Line"):
+                self.l1.line_intersection(same, exact=exact)
+            with self.assertRaisesRegex(AssertionError, "do not intersect"):
+                x_axis.line_intersection(skew, exact=exact)
+        with self.assertRaisesRegex(AssertionError, "do not intersect"):
+            self.quietly(x_axis.line_intersection, skew, symbolic=True)
+
+    def test_is_same_line(self):
+        same = Line(v(5,7,9), v(-8,-10,-12), verbose=False)
+        for line, expected in [(same, True), (self.l2, False)]:
+            self.assertEqual(self.l1.is_same_line(line), expected)
+            self.assertEqual(self.l1.is_same_line(line, exact=True), expected)
+            self.assertEqual(self.quietly(self.l1.is_same_line, line, symbolic=True), expected)
+
+    def test_plane_line_intersection(self):
+        self.assertEqual(self.plane.line_intersection(self.line), v(2,8,2))
+        self.assertEqual(self.quietly(self.plane.line_intersection, self.line, symbolic=True), v(2,8,2))
+        point = self.plane.line_intersection(self.line, exact=True)
+        self.assertEqual(point, v(2,8,2))
+        self.assertExact(point)
+
+        parallel = Line(v(0,0,0), v(1,2,1), verbose=False)
+        for exact in [False, True]:
+            with self.assertRaisesRegex(AssertionError, "does not intersect"):
+                self.plane.line_intersection(parallel, exact=exact)
+        with self.assertRaisesRegex(AssertionError, "does not intersect"):
+            self.quietly(self.plane.line_intersection, parallel, symbolic=True)
+
+    def test_tolerance(self):
+        # |w x d| against tol |w||d|, a point 1e-9 off a unit Line at distance 1 sits on the boundary
+        x_axis = Line(v(0,0,0), v(1,0,0), verbose=False)
+        self.assertTrue(x_axis.is_on(v(1, 0.9e-9, 0)))
+        self.assertFalse(x_axis.is_on(v(1, 1.1e-9, 0)))
+        self.assertTrue(x_axis.is_on(v(1, 1.1e-9, 0), tol=1.2e-9))
+        self.assertFalse(x_axis.is_on(v(1, 0.9e-9, 0), exact=True))
+
+        self.assertTrue(same_direction(v(1,0,0), v(1, 0.9e-9, 0)))
+        self.assertFalse(same_direction(v(1,0,0), v(1, 1.1e-9, 0)))
+        self.assertFalse(same_direction(v(1,0,0), v(1, 0.9e-9, 0), tol=0.8e-9))
+        self.assertFalse(same_direction(v(1,0,0), v(1, 0.9e-9, 0), exact=True))
+
+
+class Test_Vector(unittest.TestCase):
+    def test_arithmetic(self):
+        a, b = v(1,2,3), v(4,5,6)
+        self.assertEqual(a + b, v(5,7,9))
+        self.assertEqual(b - a, v(3,3,3))
+        self.assertEqual(a * 2, v(2,4,6))
+        self.assertEqual(2 * a, v(2,4,6))
+        self.assertEqual(b / 2, v(2,2.5,3))
+        self.assertEqual(-a, v(-1,-2,-3))
+        self.assertEqual(a.dot(b), 32)
+        self.assertEqual(a.cross(b), v(-3,6,-3))
+        self.assertEqual(v(3,0,4).mag, 5)
+        self.assertEqual(list(a), [1,2,3])
+        self.assertEqual(v(Fraction(1, 3),0,0) * 3, v(1,0,0))
+
+        for product in [np.float64(2) * a, a * np.float64(2), np.int64(2) * a]:
+            self.assertIsInstance(product, Vector)
+            self.assertEqual(product, v(2,4,6))
+        # Without __array_ufunc__ = None, an array on the left broadcasts into an object array of Vectors
+        for product in [np.arange(2.0) * a, a * np.arange(2.0)]:
+            self.assertIsInstance(product, Vector)
+            np.testing.assert_array_equal(product.x, [0, 1])
+            np.testing.assert_array_equal(product.z, [0, 3])
+
+    def test_immutable(self):
+        a = v(1,2,3)
+        with self.assertRaises(AttributeError):
+            a.x = 5
+        with self.assertRaises(AttributeError):
+            del a.y
+        with self.assertRaises(AttributeError):
+            a.w = 0
+        self.assertEqual(a, v(1,2,3))
+        self.assertEqual(hash(a), hash(v(1,2,3)))
+        self.assertEqual(len({a, v(1,2,3), v(3,2,1)}), 2)
+        self.assertEqual(pickle.loads(pickle.dumps(a)), a)
+
+    def test_module_functions(self):
+        a, b = v(1,2,3), v(4,5,6)
+        self.assertEqual(mag(v(3,0,4)), 5)
+        self.assertEqual(dot(a, b), a.dot(b))
+        self.assertEqual(cross(a, b), a.cross(b))
+        self.assertEqual(norm(v(3,0,4)), v(0.6,0,0.8))
+        self.assertEqual(v(3,0,4).norm(), v(0.6,0,0.8))
+        self.assertEqual(v(3,0,4).hat, v(0.6,0,0.8))
+
+    def test_norm_of_zero(self):
+        self.assertEqual(norm(origin), v(0,0,0))
+        self.assertEqual(origin.norm(), v(0,0,0))
+        self.assertEqual(origin.hat, v(0,0,0))
+
+    def test_proj(self):
+        self.assertEqual(proj(v(1,2,3), v(0,0,2)), v(0,0,3))
+        self.assertEqual(v(1,2,3).proj(v(0,0,2)), v(0,0,3))
+        self.assertEqual(proj(v(1,0,0), v(0,1,0)), v(0,0,0))
+
+    def test_diff_angle(self):
+        self.assertAlmostEqual(diff_angle(v(1,0,0), v(0,1,0)), pi / 2)
+        self.assertAlmostEqual(v(1,0,0).diff_angle(v(-1,0,0)), pi)
+        # Rounding can push the cosine of parallel vectors past 1, acos would raise
+        for a, b in [(v(1,1,1), v(2,2,2)), (v(0.1,0.2,0.3), v(0.3,0.6,0.9))]:
+            self.assertEqual(diff_angle(a, b), 0)
+            self.assertEqual(a.diff_angle(b), 0)
+
+    @unittest.skipUnless(importlib.util.find_spec("vpython"), "vpython is not installed")
+    def test_vpython(self):
+        from vpython import vector as vpython_vector
+        self.assertEqual(v(1,2,3), vpython_vector(1,2,3))
+        self.assertNotEqual(v(1,2,3), vpython_vector(1,2,4))
+        self.assertEqual(v(1,2,3).to_vpython(), vpython_vector(1,2,3))
+
+    def test_lazy_imports(self):
+        # A fresh interpreter, this one may already have loaded sympy
+        code = "import sys, vector_solver; print('sympy' in sys.modules, 'vpython' in sys.modules)"
+        output = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.split(), ["False", "False"])
+
+
 def test():
     l1 = Line(v(1,2,3), v(4,5,6))
     assert l1.point(0) == v(1,2,3)
@@ -353,6 +1123,6 @@ def test():
     assert p1.is_on(v(3,4,1))
     assert p1.is_on(v(-1,-2,-3))
 
-    assert Plane(v(0,0,0), v(2,1,-4), 4).line_intersection(Line(v(0,2,0),v(1,3,1))) == v(2,8,2)
+    assert Plane(v(0,0,0), v(2,1,-4), 4, use_d=True).line_intersection(Line(v(0,2,0),v(1,3,1))) == v(2,8,2)
     
 # test()
\ No newline at end of file